@@ -8,7 +8,11 @@ from app.config import get_settings
 
 settings = get_settings()
 
-engine = create_async_engine(settings.database_url, echo=False)
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    connect_args={"server_settings": {"hnsw.ef_search": str(settings.ann_ef_search)}},
+)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -16,11 +20,50 @@ class Base(DeclarativeBase):
     pass
 
 
+# In-place upgrades for databases created before a column or index existed.
+# create_all only creates missing tables, so new columns on existing tables are
+# added here. Every statement must be idempotent — they run on each startup.
+SCHEMA_UPGRADES = [
+    # Stored FTS vector + GIN index; adding the generated column backfills existing rows
+    """ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector
+       GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_sermon_chunks_content_tsv ON sermon_chunks USING gin (content_tsv)",
+    # Reduced-dimension ANN column; existing rows are filled by scripts/backfill_ann_embeddings.py
+    f"ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS embedding_ann halfvec({settings.ann_dimensions})",
+    """CREATE INDEX IF NOT EXISTS ix_sermon_chunks_embedding_ann ON sermon_chunks
+       USING hnsw (embedding_ann halfvec_cosine_ops)""",
+    # Binary codes for the Hamming prefilter; existing rows are filled by scripts/backfill_binary_embeddings.py
+    f"ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS embedding_bin bit({settings.embedding_dimensions})",
+    # HNSW over the bit codes, so the Hamming prefilter reads the index instead of the chunk heap
+    """CREATE INDEX IF NOT EXISTS ix_sermon_chunks_embedding_bin ON sermon_chunks
+       USING hnsw (embedding_bin bit_hamming_ops)""",
+    # Per-stage latency breakdown of assistant messages
+    "ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS stage_timings jsonb",
+    # Source metadata denormalized onto chunks for filtered retrieval, backfilled once
+    # (source_type is always set on sources, so NULL marks a row not yet copied)
+    "ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS speaker varchar(200)",
+    "ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS sermon_date timestamp",
+    "ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS source_type sourcetype",
+    "ALTER TABLE sermon_chunks ADD COLUMN IF NOT EXISTS sermon_number varchar(50)",
+    """UPDATE sermon_chunks sc
+       SET speaker = ss.speaker, sermon_date = ss.sermon_date,
+           source_type = ss.source_type, sermon_number = ss.sermon_number
+       FROM sermon_sources ss
+       WHERE sc.source_id = ss.id AND sc.source_type IS NULL""",
+    "CREATE INDEX IF NOT EXISTS ix_sermon_chunks_speaker_date ON sermon_chunks (speaker, sermon_date)",
+    "CREATE INDEX IF NOT EXISTS ix_sermon_chunks_source_type_date ON sermon_chunks (source_type, sermon_date)",
+    "CREATE INDEX IF NOT EXISTS ix_sermon_chunks_sermon_date ON sermon_chunks (sermon_date)",
+    "CREATE INDEX IF NOT EXISTS ix_sermon_chunks_sermon_number ON sermon_chunks (sermon_number)",
+]
+
+
 async def init_db():
-    """Create tables and enable pgvector extension."""
+    """Create tables, enable pgvector extension and apply schema upgrades."""
     async with engine.begin() as conn:
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
 
 
 async def get_db() -> AsyncSession:
@@ -2,15 +2,22 @@
 
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.config import get_settings
-from app.database import init_db
+from app.database import async_session, init_db
 from app.rate_limit import limiter
-from app.routers import auth, chat, feedback, history, ingest
+from app.routers import auth, chat, feedback, history, ingest, search
+from app.services.answer_cache import answer_cache_stats
+from app.services.corpus import load_source_metadata
+from app.services.embedder import embedding_cache_stats
+from app.services.llm_provider import llm_router_state, prompt_cache_stats
+from app.services.query_rewriter import rewrite_cache_stats
+from app.services.search import search_cache_stats
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,10 +29,12 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database and warm the source metadata cache on startup."""
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized. pgvector extension enabled.")
+    async with async_session() as db:
+        await load_source_metadata(db)
     yield
     logger.info("Shutting down.")
 
@@ -62,8 +71,33 @@ app.include_router(chat.router)
 app.include_router(feedback.router)
 app.include_router(history.router)
 app.include_router(ingest.router)
+app.include_router(search.router)
 
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok", "service": "grii-sermon-rag"}
+
+
+@app.get("/api/health/cache")
+async def cache_health():
+    """Hit/miss counters for the hot-path caches of this worker."""
+    return {
+        "query_embedding": embedding_cache_stats(),
+        "answer": answer_cache_stats(),
+        "rewrite": rewrite_cache_stats(),
+        "llm_prompt": prompt_cache_stats(),
+        "search": search_cache_stats(),
+    }
+
+
+@app.get("/api/health/llm")
+async def llm_health():
+    """Provider routing, hedge counters and circuit-breaker state for this worker."""
+    return llm_router_state()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition: per-stage RAG latency histograms (rag_stage_duration_seconds)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -2,11 +2,11 @@
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, Boolean,
-    Enum as SAEnum, ForeignKey, UniqueConstraint,
+    Enum as SAEnum, ForeignKey, UniqueConstraint, Computed, Index,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC, BIT
 from datetime import datetime
 import enum
 
@@ -62,12 +62,69 @@ class SermonChunk(Base):
     source_id = Column(Integer, nullable=False, index=True)
     content = Column(Text, nullable=False)
     embedding = Column(Vector(settings.embedding_dimensions))
+    # Truncated half-precision copy of `embedding` for the HNSW index (3072 dims is too many)
+    embedding_ann = Column(HALFVEC(settings.ann_dimensions), nullable=True)
+    # Sign-bit quantized `embedding` (384 bytes) for the Hamming prefilter
+    embedding_bin = Column(BIT(settings.embedding_dimensions), nullable=True)
     chunk_index = Column(Integer, nullable=False)           # Position within source
     page_number = Column(Integer, nullable=True)            # PDF page number
     timestamp_start = Column(String(20), nullable=True)     # YouTube timestamp
+    # Full-text search vector, maintained by Postgres on every insert/update
+    content_tsv = Column(TSVECTOR, Computed("to_tsvector('simple', content)", persisted=True))
+    # Copied from the source so retrieval filters are indexed predicates on this table;
+    # kept in step by ingestion and corpus.sync_chunk_metadata
+    speaker = Column(String(200), nullable=True)
+    sermon_date = Column(DateTime, nullable=True)
+    source_type = Column(SAEnum(SourceType), nullable=True)
+    sermon_number = Column(String(50), nullable=True)
     metadata_ = Column("metadata", JSONB, default=dict)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_sermon_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
+        Index("ix_sermon_chunks_speaker_date", "speaker", "sermon_date"),
+        Index("ix_sermon_chunks_source_type_date", "source_type", "sermon_date"),
+        Index("ix_sermon_chunks_sermon_date", "sermon_date"),
+        Index("ix_sermon_chunks_sermon_number", "sermon_number"),
+        Index(
+            "ix_sermon_chunks_embedding_ann", "embedding_ann",
+            postgresql_using="hnsw", postgresql_ops={"embedding_ann": "halfvec_cosine_ops"},
+        ),
+        Index(
+            "ix_sermon_chunks_embedding_bin", "embedding_bin",
+            postgresql_using="hnsw", postgresql_ops={"embedding_bin": "bit_hamming_ops"},
+        ),
+    )
+
+
+class QueryEmbeddingCache(Base):
+    """Persistent tier of the query-embedding cache, shared by all workers."""
+    __tablename__ = "query_embedding_cache"
+
+    cache_key = Column(String(64), primary_key=True)        # sha256 of model, dimensions, normalized query
+    model = Column(String(100), nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    query = Column(Text, nullable=False)
+    embedding = Column(Vector(), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AnswerCache(Base):
+    """Semantic answer cache — stored answers served to near-duplicate questions."""
+    __tablename__ = "answer_cache"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scope = Column(String(200), nullable=False, index=True)  # corpus version + embedding space
+    question = Column(Text, nullable=False)
+    question_embedding = Column(Vector(), nullable=False)
+    answer = Column(Text, nullable=False)
+    citations = Column(JSONB, nullable=True)
+    language = Column(String(10), nullable=True)
+    context_chunk_count = Column(Integer, nullable=True)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 
 # --- New auth / chat models ---
 
@@ -117,6 +174,7 @@ class ChatMessage(Base):
     citations = Column(JSONB, nullable=True)
     generation_time_ms = Column(Integer, nullable=True)
     context_chunk_count = Column(Integer, nullable=True)
+    stage_timings = Column(JSONB, nullable=True)  # Per-stage pipeline latency (ms), e.g. {"rerank": 812}
     language = Column(String(10), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -9,6 +9,8 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 from starlette.requests import Request
 
+from app.config import get_settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +28,7 @@ def _get_rate_limit_key(request: Request) -> str:
 
 # Create the limiter instance
 limiter = Limiter(
+    enabled=get_settings().rate_limit_enabled,
     key_func=_get_rate_limit_key,
     default_limits=["200/hour"],  # Global default
     storage_uri="memory://",      # In-memory storage (resets on restart)
@@ -37,5 +40,7 @@ CHAT_LIMIT_AUTH = "30/minute;200/hour;500/day"
 STREAM_LIMIT_AUTH = "30/minute;200/hour;500/day"
 # Feedback (light endpoint)
 FEEDBACK_LIMIT = "60/minute"
+# Search (retrieval only, no LLM)
+SEARCH_LIMIT = "120/minute;2000/hour"
 # History (read-only)
 HISTORY_LIMIT = "120/minute"
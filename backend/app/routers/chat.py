@@ -17,7 +17,7 @@ from app.database import get_db
 from app.models import User, Conversation, ChatMessage, MessageRole
 from app.rate_limit import limiter, CHAT_LIMIT_AUTH
 from app.schemas import ChatRequest, ChatResponse
-from app.services.query_engine import query_sermons, query_sermons_stream
+from app.services.query_engine import RetrievalFilters, query_sermons, query_sermons_stream
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/chat", tags=["Chat"])
@@ -34,7 +34,8 @@ def _sanitize_question(question: str) -> str:
     return q
 
 
-
+def _retrieval_filters(body: ChatRequest) -> RetrievalFilters | None:
+    return RetrievalFilters(**body.filters.model_dump()) if body.filters else None
 
 
 async def _fetch_chat_history(
@@ -93,10 +94,15 @@ async def chat(
         raise HTTPException(status_code=401, detail="Sign in to use the chatbot")
     body.question = _sanitize_question(body.question)
 
-    # Fetch conversation history for context
+    # Fetch conversation history for context, then end the read transaction so
+    # this request holds no connection while retrieval uses its own
     history = await _fetch_chat_history(db, body.conversation_id, user)
+    await db.commit()
 
-    result = await query_sermons(db, body.question, body.language, chat_history=history)
+    result = await query_sermons(
+        db, body.question, body.language, chat_history=history, use_cache=not body.bypass_cache,
+        filters=_retrieval_filters(body),
+    )
 
     # Persist conversation
     conv = await _get_or_create_conversation(db, user, body.conversation_id, body.question)
@@ -110,6 +116,7 @@ async def chat(
         citations=result.get("citations"),
         generation_time_ms=result.get("generation_time_ms"),
         context_chunk_count=result.get("context_chunk_count"),
+        stage_timings=result.get("timings"),
         language=result.get("language"),
     ))
     await db.commit()
@@ -149,8 +156,12 @@ async def chat_stream(
             citations_data = []
             gen_time = None
             chunk_count = None
+            stage_timings = None
 
-            async for event in query_sermons_stream(db, body.question, body.language, chat_history=history):
+            async for event in query_sermons_stream(
+                db, body.question, body.language, chat_history=history, use_cache=not body.bypass_cache,
+                filters=_retrieval_filters(body),
+            ):
                 yield f"data: {json.dumps(event)}\n\n"
 
                 if event["type"] == "token":
@@ -160,6 +171,7 @@ async def chat_stream(
                 elif event["type"] == "telemetry":
                     gen_time = event["data"].get("generation_time_ms")
                     chunk_count = event["data"].get("context_chunk_count")
+                    stage_timings = event["data"].get("timings")
 
             # Persist assistant message
             asst_msg = ChatMessage(
@@ -168,6 +180,7 @@ async def chat_stream(
                 citations=citations_data if citations_data else None,
                 generation_time_ms=gen_time,
                 context_chunk_count=chunk_count,
+                stage_timings=stage_timings,
                 language=body.language,
             )
             db.add(asst_msg)
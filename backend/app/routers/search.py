@@ -0,0 +1,45 @@
+"""Search API router — ranked sermon passages without an LLM in the path."""
+
+import logging
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.requests import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.models import SourceType
+from app.rate_limit import limiter, SEARCH_LIMIT
+from app.schemas import SearchResponse
+from app.services.query_engine import RetrievalFilters
+from app.services.search import InvalidCursor, search_passages
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+
+@router.get("", response_model=SearchResponse)
+@limiter.limit(SEARCH_LIMIT)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=500, description="What to look for"),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    speaker: Optional[str] = Query(None, max_length=200, description="Case-insensitive part of the speaker name"),
+    source_type: Optional[SourceType] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sermon_number: Optional[str] = Query(None, max_length=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Find sermon passages for a topic: hybrid retrieval only, no rewrite, rerank or answer."""
+    query = " ".join(q.split())
+    filters = RetrievalFilters(
+        speaker=speaker, source_type=source_type, date_from=date_from, date_to=date_to, sermon_number=sermon_number,
+    )
+    try:
+        page = await search_passages(db, query, filters or None, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"query": query, **page}
@@ -1,16 +1,26 @@
 """Pydantic schemas for API request/response models."""
 
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Literal, Optional
+from datetime import date, datetime
 
 
 # --- Chat ---
 
+class SermonFilters(BaseModel):
+    speaker: Optional[str] = Field(None, max_length=200, description="Case-insensitive part of the speaker name, e.g. 'Stephen Tong'")
+    source_type: Optional[Literal["pdf_morning", "pdf_afternoon", "youtube"]] = None
+    date_from: Optional[date] = Field(None, description="Earliest sermon date (inclusive)")
+    date_to: Optional[date] = Field(None, description="Latest sermon date (inclusive)")
+    sermon_number: Optional[str] = Field(None, max_length=50, description="e.g. MRI-1847")
+
+
 class ChatRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=2000)
     language: Optional[str] = Field(None, description="Force response language: 'id' or 'en'. Auto-detected if omitted.")
     conversation_id: Optional[int] = Field(None, description="Continue an existing conversation")
+    bypass_cache: bool = Field(False, description="Skip the semantic answer cache and always run the full pipeline")
+    filters: Optional[SermonFilters] = Field(None, description="Only answer from matching sermons")
 
 
 class SourceCitation(BaseModel):
@@ -29,6 +39,31 @@ class ChatResponse(BaseModel):
     answer: str
     citations: list[SourceCitation] = []
     language: str = "id"
+    cached: bool = False
+
+
+# --- Search ---
+
+class SearchHit(BaseModel):
+    chunk_id: int
+    source_id: int
+    title: str
+    speaker: Optional[str] = None
+    sermon_date: Optional[str] = None
+    sermon_number: Optional[str] = None
+    source_type: str
+    source_url: Optional[str] = None
+    score: float = Field(..., description="RRF fused score")
+    rank: int
+    snippet: str = Field(..., description="HTML-escaped excerpt with matching terms in <mark>")
+    page_or_timestamp: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list[SearchHit] = []
+    next_cursor: Optional[str] = None
+    total: int = Field(..., description="Passages available across all pages")
 
 
 # --- Ingestion ---
@@ -0,0 +1,132 @@
+"""Semantic answer cache — serves stored answers to near-duplicate questions.
+
+A question whose embedding lies within ``answer_cache_max_distance`` (cosine)
+of a previously answered one, asked against the same corpus version, gets the
+stored answer and citations without running the RAG pipeline.
+
+Entries live in Postgres so every worker shares them. They expire after
+``answer_cache_ttl_seconds``; beyond ``answer_cache_max_entries`` the least
+recently hit are evicted, and ingestion clears the table outright. Stores run
+in the background, and eviction at most once per
+``cache_prune_interval_seconds`` per worker.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
+
+from app.database import async_session
+from app.models import AnswerCache
+from app.services.cache import PruneSchedule
+from app.services.corpus import get_corpus_version
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_stats = {"hits": 0, "misses": 0, "errors": 0}
+_prune_schedule = PruneSchedule(settings.cache_prune_interval_seconds)
+
+
+def _scope(corpus_version: str) -> str:
+    """Entries are only comparable within one corpus and embedding space."""
+    return f"{corpus_version}|{settings.embedding_model}|{settings.embedding_dimensions}"
+
+
+async def lookup_answer(question_embedding: list[float]) -> dict | None:
+    """Return the cached result for the nearest equivalent question, or None."""
+    try:
+        async with async_session() as session:
+            scope = _scope(await get_corpus_version(session))
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.answer_cache_ttl_seconds)
+            distance = AnswerCache.question_embedding.cosine_distance(question_embedding)
+
+            result = await session.execute(
+                select(AnswerCache, distance.label("distance"))
+                .where(AnswerCache.scope == scope)
+                .where(AnswerCache.created_at >= cutoff)
+                .order_by(distance)
+                .limit(1)
+            )
+            row = result.first()
+            if row is None or row.distance > settings.answer_cache_max_distance:
+                _stats["misses"] += 1
+                return None
+
+            entry = row.AnswerCache
+            await session.execute(
+                update(AnswerCache)
+                .where(AnswerCache.id == entry.id)
+                .values(hit_count=AnswerCache.hit_count + 1, last_hit_at=datetime.utcnow())
+            )
+            await session.commit()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning("Answer cache lookup failed: %s", e)
+        return None
+
+    _stats["hits"] += 1
+    logger.info("Answer cache hit (distance %.4f): '%s'", row.distance, entry.question[:80])
+    return {
+        "answer": entry.answer,
+        "citations": entry.citations or [],
+        "language": entry.language or "id",
+        "generation_time_ms": 0,
+        "context_chunk_count": entry.context_chunk_count or 0,
+        "cached": True,
+    }
+
+
+async def _prune() -> None:
+    """Evict expired entries, then the least recently hit beyond the bound."""
+    async with async_session() as session:
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.answer_cache_ttl_seconds)
+        await session.execute(delete(AnswerCache).where(AnswerCache.created_at < cutoff))
+        count = (await session.execute(select(func.count(AnswerCache.id)))).scalar() or 0
+        if count > settings.answer_cache_max_entries:
+            stale = (
+                select(AnswerCache.id)
+                .order_by(AnswerCache.last_hit_at.asc())
+                .limit(count - settings.answer_cache_max_entries)
+            )
+            await session.execute(delete(AnswerCache).where(AnswerCache.id.in_(stale)))
+        await session.commit()
+
+
+async def store_answer(question: str, question_embedding: list[float], result: dict) -> None:
+    """Store a freshly generated answer, pruning the table when this worker's schedule is due.
+
+    Meant to run in the background (``run_in_background``); never raises.
+    """
+    try:
+        async with async_session() as session:
+            scope = _scope(await get_corpus_version(session))
+            session.add(AnswerCache(
+                scope=scope,
+                question=question[:2000],
+                question_embedding=question_embedding,
+                answer=result["answer"],
+                citations=result.get("citations"),
+                language=result.get("language"),
+                context_chunk_count=result.get("context_chunk_count"),
+            ))
+            await session.commit()
+        if _prune_schedule.due():
+            await _prune()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning("Answer cache store failed: %s", e)
+
+
+async def clear_answer_cache() -> None:
+    """Drop every cached answer — called after ingestion changes the corpus."""
+    try:
+        async with async_session() as session:
+            await session.execute(delete(AnswerCache))
+            await session.commit()
+    except Exception as e:
+        logger.warning("Answer cache clear failed: %s", e)
+
+
+def answer_cache_stats() -> dict:
+    return {"enabled": settings.answer_cache_enabled, **_stats}
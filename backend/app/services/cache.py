@@ -0,0 +1,97 @@
+"""In-process LRU cache with per-entry TTL and hit/miss counters.
+
+Shared building block for the hot-path caches (query embeddings, rewrites).
+Thread-safe, since some callers run inside worker threads.
+
+Also the helpers the Postgres-backed caches use to keep writes off the
+request path: ``run_in_background`` for fire-and-forget stores, and
+``PruneSchedule`` to evict at most once per interval per worker.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire ``ttl_seconds`` after insertion."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value (marking it recently used), or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or refresh an entry, evicting the least recently used if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+def run_in_background(coro) -> None:
+    """Schedule a cache write without awaiting it.
+
+    Holds a reference until the task finishes, so it isn't garbage collected
+    mid-flight. The coroutine must handle its own errors.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+class PruneSchedule:
+    """Per-worker throttle for pruning a cache table: due at most once per interval."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._last = float("-inf")
+
+    def due(self) -> bool:
+        """True (and the interval restarts) if the last prune was long enough ago."""
+        now = time.monotonic()
+        if now - self._last < self.interval_seconds:
+            return False
+        self._last = now
+        return True
@@ -0,0 +1,170 @@
+"""Context assembly — turns re-ranked chunks into the prompt's sermon excerpts.
+
+Chunks are split with overlap (``chunk_overlap``), so two neighbouring chunks
+of the same sermon repeat a sentence or two. Before the excerpts go to the LLM:
+  1. consecutive chunks (by chunk_index) of the same source are merged into a
+     single span, with the overlapping text stripped
+  2. spans are ordered by their best-ranked chunk, so [Source 1] is always the
+     most relevant excerpt and the numbering is deterministic
+  3. spans are added until ``context_token_budget`` is reached; the last one is
+     truncated at a sentence boundary rather than dropped
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_CHARS_PER_TOKEN = 4  # Rough average for Indonesian/English with OpenAI-style tokenizers
+_MIN_OVERLAP_CHARS = 20
+_MAX_OVERLAP_CHARS = 2000
+_MIN_TRUNCATED_TOKENS = 50  # Don't bother adding a truncated span shorter than this
+_SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass
+class ContextSpan:
+    chunks: list[dict]  # Merged chunks, in chunk_index order
+    content: str
+    best_rank: int  # Position of the most relevant chunk in the re-ranked list
+
+
+@dataclass
+class BuiltContext:
+    text: str
+    spans: list[ContextSpan] = field(default_factory=list)
+    tokens: int = 0
+    tokens_saved: int = 0  # vs. concatenating the chunks as-is
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def _strip_overlap(previous: str, following: str) -> str:
+    """Drop the prefix of ``following`` that repeats the tail of ``previous``."""
+    probe = following[:_MIN_OVERLAP_CHARS]
+    if len(probe) < _MIN_OVERLAP_CHARS:
+        return following
+
+    start = max(0, len(previous) - _MAX_OVERLAP_CHARS)
+    pos = previous.find(probe, start)
+    while pos != -1:
+        tail = previous[pos:]
+        if following.startswith(tail):
+            return following[len(tail):].lstrip()
+        pos = previous.find(probe, pos + 1)
+    return following
+
+
+def _merge_spans(chunks: list[dict]) -> list[ContextSpan]:
+    """Group chunks into runs of consecutive chunk_index within one source."""
+    ranked = {}
+    for rank, chunk in enumerate(chunks):
+        ranked.setdefault(chunk["id"], (rank, chunk))  # Dedup repeated chunk ids
+
+    by_position = sorted(
+        ranked.values(),
+        key=lambda rc: (rc[1]["source_id"], rc[1].get("chunk_index") or 0),
+    )
+
+    spans: list[ContextSpan] = []
+    for rank, chunk in by_position:
+        last = spans[-1] if spans else None
+        if (
+            last is not None
+            and chunk.get("chunk_index") is not None
+            and last.chunks[-1]["source_id"] == chunk["source_id"]
+            and last.chunks[-1].get("chunk_index") is not None
+            and chunk["chunk_index"] - last.chunks[-1]["chunk_index"] == 1
+        ):
+            last.content += " " + _strip_overlap(last.content, chunk["content"])
+            last.chunks.append(chunk)
+            last.best_rank = min(last.best_rank, rank)
+        elif last is not None and chunk["content"] in last.content:
+            last.best_rank = min(last.best_rank, rank)  # Fully contained duplicate
+        else:
+            spans.append(ContextSpan(chunks=[chunk], content=chunk["content"], best_rank=rank))
+
+    spans.sort(key=lambda span: span.best_rank)
+    return spans
+
+
+def _span_header(index: int, chunk: dict) -> str:
+    header = f"[Source {index}]"
+    if chunk.get("sermon_number"):
+        header += f" {chunk['sermon_number']}"
+    if chunk.get("title"):
+        header += f" - {chunk['title']}"
+    if chunk.get("speaker"):
+        header += f" ({chunk['speaker']})"
+    if chunk.get("sermon_date"):
+        header += f" [{chunk['sermon_date'][:10]}]"
+    if chunk.get("scripture_ref"):
+        header += f" | {chunk['scripture_ref']}"
+    return header
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring the last sentence boundary."""
+    cut = text[: max_tokens * _CHARS_PER_TOKEN]
+    boundary = max((m.end() for m in re.finditer(r"[.!?]\s", cut)), default=0)
+    return (cut[:boundary] if boundary > len(cut) // 2 else cut).rstrip() + " …"
+
+
+def build_context(
+    chunks: list[dict],
+    max_chunks: int | None = None,
+    token_budget: int | None = None,
+) -> BuiltContext:
+    """Build the context string from re-ranked chunks under a token budget."""
+    max_chunks = max_chunks or settings.rerank_top_n
+    token_budget = token_budget or settings.context_token_budget
+    top_chunks = chunks[:max_chunks]
+
+    naive_tokens = estimate_tokens(
+        _SEPARATOR.join(f"{_span_header(i, c)}\n{c['content']}" for i, c in enumerate(top_chunks, 1))
+    )
+
+    spans = (
+        _merge_spans(top_chunks)
+        if settings.context_merge_adjacent
+        else [ContextSpan(chunks=[c], content=c["content"], best_rank=i) for i, c in enumerate(top_chunks)]
+    )
+
+    parts: list[str] = []
+    used: list[ContextSpan] = []
+    tokens = 0
+    for span in spans:
+        header = _span_header(len(used) + 1, span.chunks[0])
+        separator_tokens = estimate_tokens(_SEPARATOR) if parts else 0
+        cost = separator_tokens + estimate_tokens(f"{header}\n{span.content}")
+
+        if tokens + cost > token_budget:
+            remaining = token_budget - tokens - separator_tokens - estimate_tokens(header) - 1
+            if remaining >= _MIN_TRUNCATED_TOKENS:
+                span.content = _truncate_to_tokens(span.content, remaining)
+                parts.append(f"{header}\n{span.content}")
+                used.append(span)
+                tokens += separator_tokens + estimate_tokens(parts[-1])
+            break
+
+        parts.append(f"{header}\n{span.content}")
+        used.append(span)
+        tokens += cost
+
+    text = _SEPARATOR.join(parts)
+    result = BuiltContext(
+        text=text,
+        spans=used,
+        tokens=estimate_tokens(text),
+        tokens_saved=max(0, naive_tokens - estimate_tokens(text)),
+    )
+    logger.info(
+        "Context: %d chunks → %d spans, ~%d tokens (saved ~%d)",
+        len(top_chunks), len(used), result.tokens, result.tokens_saved,
+    )
+    return result
@@ -0,0 +1,166 @@
+"""Corpus state shared by the retrieval hot path.
+
+Corpus version: a cheap fingerprint of the ingested sermon set, including a
+checksum of each source's display and filter fields. Caches that depend on
+what has been ingested (e.g. the semantic answer cache) tag their entries
+with it, so anything stored before an ingestion run or a metadata edit (such
+as scripts/backfill_speakers.py) stops matching once the corpus changes. The
+fingerprint is read from ``sermon_sources`` and memoised for a few seconds
+per worker; ingestion in this process resets it immediately, other processes
+pick the change up within ``corpus_version_ttl_seconds``.
+
+Source metadata: an in-process copy of every ``SermonSource`` row's display
+fields, loaded at startup and reloaded whenever the corpus version changes,
+so chunk enrichment needs no extra queries. Ids missing from the copy are
+fetched in one batched query.
+
+Speaker filters: loose names are resolved to exact ones with a query on the
+small ``sermon_sources`` table, so they always see the latest edits.
+
+Chunk metadata: the filterable source fields are copied onto
+``sermon_chunks``. Anything that edits them on a source afterwards must call
+``sync_chunk_metadata``.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from sqlalchemy import ARRAY, Integer, any_, bindparam, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SermonSource
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_version: str | None = None
+_version_checked_at = 0.0
+
+
+async def get_corpus_version(db: AsyncSession) -> str:
+    """Return the current corpus fingerprint (source count, max id, total chunks, metadata checksum)."""
+    global _version, _version_checked_at
+    if _version is not None and time.monotonic() - _version_checked_at < settings.corpus_version_ttl_seconds:
+        return _version
+
+    result = await db.execute(
+        select(
+            func.count(SermonSource.id),
+            func.coalesce(func.max(SermonSource.id), 0),
+            func.coalesce(func.sum(SermonSource.chunk_count), 0),
+            func.coalesce(func.sum(func.hashtext(func.concat_ws(
+                "|", SermonSource.title, SermonSource.speaker, SermonSource.sermon_date,
+                SermonSource.sermon_number, SermonSource.source_type, SermonSource.scripture_ref,
+            ))), 0),
+        )
+    )
+    count, max_id, chunks, checksum = result.one()
+    version = f"{count}:{max_id}:{chunks}:{checksum}"
+
+    if version != _version:
+        logger.info("Corpus version: %s → %s", _version, version)
+    _version = version
+    _version_checked_at = time.monotonic()
+    return version
+
+
+def mark_corpus_changed() -> None:
+    """Force the next get_corpus_version call to re-read the fingerprint."""
+    global _version_checked_at
+    _version_checked_at = 0.0
+
+
+# ─────────────────────────────────────────────
+# Source metadata cache
+# ─────────────────────────────────────────────
+_source_meta: dict[int, dict] = {}
+_source_meta_version: str | None = None
+_source_meta_lock = asyncio.Lock()
+
+
+def _source_to_meta(source: SermonSource) -> dict:
+    return {
+        "title": source.title,
+        "speaker": source.speaker,
+        "sermon_date": source.sermon_date.isoformat() if source.sermon_date else None,
+        "sermon_number": source.sermon_number,
+        "source_type": source.source_type.value if source.source_type else None,
+        "source_url": source.source_url,
+        "scripture_ref": source.scripture_ref,
+    }
+
+
+async def load_source_metadata(db: AsyncSession) -> None:
+    """(Re)load metadata for every source and stamp it with the corpus version."""
+    global _source_meta, _source_meta_version
+    version = await get_corpus_version(db)
+    result = await db.execute(select(SermonSource))
+    _source_meta = {source.id: _source_to_meta(source) for source in result.scalars().all()}
+    _source_meta_version = version
+    logger.info("Loaded metadata for %d sources (corpus %s)", len(_source_meta), version)
+
+
+async def _refresh_source_metadata(db: AsyncSession) -> None:
+    if await get_corpus_version(db) != _source_meta_version:
+        async with _source_meta_lock:
+            if await get_corpus_version(db) != _source_meta_version:
+                await load_source_metadata(db)
+
+
+async def get_source_metadata(db: AsyncSession, source_ids: list[int]) -> dict[int, dict]:
+    """Return {source_id: metadata} for the given ids.
+
+    Served from the in-process copy, reloaded first if the corpus version has
+    moved on. Any ids still missing are fetched with one ``id = ANY(:ids)`` query.
+    """
+    await _refresh_source_metadata(db)
+
+    missing = [sid for sid in set(source_ids) if sid not in _source_meta]
+    if missing:
+        result = await db.execute(
+            select(SermonSource).where(
+                SermonSource.id == any_(bindparam("ids", missing, type_=ARRAY(Integer)))
+            )
+        )
+        for source in result.scalars().all():
+            _source_meta[source.id] = _source_to_meta(source)
+
+    return {sid: _source_meta[sid] for sid in source_ids if sid in _source_meta}
+
+
+async def match_speakers(db: AsyncSession, fragment: str) -> list[str]:
+    """Exact speaker names containing ``fragment``, case-insensitively.
+
+    Lets a loose filter such as "stephen tong" become ``speaker = ANY(...)``,
+    which the chunk speaker index can serve, instead of an unindexable ILIKE.
+    """
+    needle = " ".join(fragment.lower().split())
+    pattern = "%" + re.sub(r"([\\%_])", r"\\\1", needle) + "%"
+    result = await db.execute(
+        select(SermonSource.speaker).distinct()
+        .where(func.regexp_replace(SermonSource.speaker, r"\s+", " ", "g").ilike(pattern, escape="\\"))
+    )
+    return sorted(result.scalars().all())
+
+
+async def sync_chunk_metadata(db: AsyncSession, source_ids: list[int] | None = None) -> int:
+    """Copy speaker, date, type and number from sources onto their chunks where they differ.
+
+    Returns the number of chunks updated. The caller commits.
+    """
+    result = await db.execute(
+        text(f"""
+            UPDATE sermon_chunks sc
+            SET speaker = ss.speaker, sermon_date = ss.sermon_date,
+                source_type = ss.source_type, sermon_number = ss.sermon_number
+            FROM sermon_sources ss
+            WHERE sc.source_id = ss.id
+              AND (sc.speaker, sc.sermon_date, sc.source_type, sc.sermon_number)
+                  IS DISTINCT FROM (ss.speaker, ss.sermon_date, ss.source_type, ss.sermon_number)
+              {"AND ss.id = ANY(CAST(:ids AS integer[]))" if source_ids is not None else ""}
+        """),
+        {"ids": source_ids} if source_ids is not None else {},
+    )
+    return result.rowcount
@@ -1,19 +1,41 @@
-"""Embedding generation service using OpenAI."""
+"""Embedding generation service using OpenAI.
 
+Query embeddings go through a two-tier cache keyed on the normalized query
+text plus embedding model and dimensions:
+  1. an in-process LRU with TTL (per worker)
+  2. a Postgres table shared by all workers that survives restarts. Writes
+     happen in the background, and each worker prunes it by age and size at
+     most once per ``cache_prune_interval_seconds``
+"""
+
+import asyncio
+import hashlib
 import logging
+import math
+from datetime import datetime, timedelta
 from openai import OpenAI
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
 from app.config import get_settings
+from app.database import async_session
+from app.models import QueryEmbeddingCache
+from app.services.cache import PruneSchedule, TTLCache, run_in_background
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 _client: OpenAI | None = None
 
+_query_cache = TTLCache(settings.embedding_cache_size, settings.embedding_cache_ttl_seconds)
+_persistent_stats = {"hits": 0, "misses": 0, "errors": 0}
+_prune_schedule = PruneSchedule(settings.cache_prune_interval_seconds)
+
 
 def _get_client() -> OpenAI:
     global _client
     if _client is None:
-        _client = OpenAI(api_key=settings.openai_api_key)
+        _client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None)
     return _client
 
 
@@ -45,3 +67,131 @@ def generate_embeddings(texts: list[str], batch_size: int = 100) -> list[list[fl
 def generate_single_embedding(text: str) -> list[float]:
     """Generate embedding for a single text."""
     return generate_embeddings([text])[0]
+
+
+def truncate_embedding(embedding: list[float], dimensions: int | None = None) -> list[float]:
+    """Matryoshka-truncate an embedding to its first N dims and re-normalise.
+
+    text-embedding-3 models are trained so that leading prefixes remain good
+    embeddings; re-normalising keeps cosine distance meaningful.
+    """
+    dimensions = dimensions or settings.ann_dimensions
+    prefix = [float(x) for x in embedding[:dimensions]]
+    norm = math.sqrt(sum(x * x for x in prefix)) or 1.0
+    return [x / norm for x in prefix]
+
+
+def binary_quantize(embedding: list[float]) -> str:
+    """1-bit code per dimension (1 where positive), as a bit string for pgvector's bit type.
+
+    Matches pgvector's binary_quantize(), so codes written at ingestion and
+    computed from the query in SQL are comparable by Hamming distance.
+    """
+    return "".join("1" if x > 0 else "0" for x in embedding)
+
+
+def _query_cache_key(text: str) -> str:
+    """Cache key: normalized query text + embedding model + dimensions."""
+    normalized = " ".join(text.lower().split())
+    raw = f"{settings.embedding_model}|{settings.embedding_dimensions}|{normalized}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def _load_persistent(cache_key: str) -> list[float] | None:
+    cutoff = datetime.utcnow() - timedelta(days=settings.embedding_cache_persistent_ttl_days)
+    async with async_session() as session:
+        result = await session.execute(
+            select(QueryEmbeddingCache.embedding)
+            .where(QueryEmbeddingCache.cache_key == cache_key)
+            .where(QueryEmbeddingCache.created_at >= cutoff)
+        )
+        embedding = result.scalar_one_or_none()
+    return [float(x) for x in embedding] if embedding is not None else None
+
+
+async def _prune_persistent() -> None:
+    """Evict expired entries, then the oldest beyond the size bound."""
+    async with async_session() as session:
+        cutoff = datetime.utcnow() - timedelta(days=settings.embedding_cache_persistent_ttl_days)
+        await session.execute(delete(QueryEmbeddingCache).where(QueryEmbeddingCache.created_at < cutoff))
+        count = (await session.execute(select(func.count()).select_from(QueryEmbeddingCache))).scalar() or 0
+        if count > settings.embedding_cache_persistent_max_entries:
+            oldest = (
+                select(QueryEmbeddingCache.cache_key)
+                .order_by(QueryEmbeddingCache.created_at.asc())
+                .limit(count - settings.embedding_cache_persistent_max_entries)
+            )
+            await session.execute(delete(QueryEmbeddingCache).where(QueryEmbeddingCache.cache_key.in_(oldest)))
+        await session.commit()
+
+
+async def _store_persistent(cache_key: str, text: str, embedding: list[float]) -> None:
+    """Upsert one embedding, pruning the table when this worker's schedule is due.
+
+    Runs in the background; failures are counted and logged, never raised.
+    """
+    try:
+        async with async_session() as session:
+            await session.execute(
+                insert(QueryEmbeddingCache)
+                .values(
+                    cache_key=cache_key,
+                    model=settings.embedding_model,
+                    dimensions=settings.embedding_dimensions,
+                    query=text[:2000],
+                    embedding=embedding,
+                    created_at=datetime.utcnow(),
+                )
+                .on_conflict_do_update(
+                    index_elements=[QueryEmbeddingCache.cache_key],
+                    set_={"embedding": embedding, "created_at": datetime.utcnow()},
+                )
+            )
+            await session.commit()
+        if _prune_schedule.due():
+            await _prune_persistent()
+    except Exception as e:
+        _persistent_stats["errors"] += 1
+        logger.warning("Embedding cache store failed: %s", e)
+
+
+async def embed_query(text: str) -> list[float]:
+    """Embed a search query, going through the in-process and Postgres caches.
+
+    The persistent tier is best-effort: if the database is unavailable the
+    query is simply embedded via the API.
+    """
+    cache_key = _query_cache_key(text)
+
+    embedding = _query_cache.get(cache_key)
+    if embedding is not None:
+        return embedding
+
+    if settings.embedding_cache_persistent:
+        try:
+            embedding = await _load_persistent(cache_key)
+        except Exception as e:
+            _persistent_stats["errors"] += 1
+            logger.warning("Embedding cache lookup failed: %s", e)
+        else:
+            if embedding is not None:
+                _persistent_stats["hits"] += 1
+                _query_cache.set(cache_key, embedding)
+                return embedding
+            _persistent_stats["misses"] += 1
+
+    embedding = await asyncio.to_thread(generate_single_embedding, text)
+    _query_cache.set(cache_key, embedding)
+
+    if settings.embedding_cache_persistent:
+        run_in_background(_store_persistent(cache_key, text, embedding))  # Off the retrieval path
+
+    return embedding
+
+
+def embedding_cache_stats() -> dict:
+    """Hit/miss counters for both cache tiers, for monitoring."""
+    return {
+        "memory": _query_cache.stats(),
+        "persistent": {"enabled": settings.embedding_cache_persistent, **_persistent_stats},
+    }
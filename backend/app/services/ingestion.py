@@ -11,7 +11,10 @@ from app.models import SermonSource, SermonChunk, SourceType
 from app.services.pdf_parser import extract_text_from_pdf, scan_sermon_directory, parse_filename
 from app.services.youtube import get_transcript
 from app.services.chunker import chunk_sermon_pages, chunk_text
-from app.services.embedder import generate_embeddings
+from app.services.embedder import binary_quantize, generate_embeddings, truncate_embedding
+from app.services.corpus import load_source_metadata, mark_corpus_changed
+from app.services.answer_cache import clear_answer_cache
+from app.services.vector_index import rebuild_vector_index
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -42,6 +45,17 @@ def _extract_speaker_from_yt_title(title: str) -> str:
     return ""
 
 
+async def _after_ingestion(db: AsyncSession, stats: dict) -> None:
+    """Refresh corpus-dependent caches once new sources have been committed."""
+    if not stats["sources_processed"]:
+        return
+    mark_corpus_changed()
+    await load_source_metadata(db)
+    await clear_answer_cache()
+    if settings.vector_backend == "mmap":
+        await rebuild_vector_index(db)
+
+
 async def ingest_pdf_directory(
     db: AsyncSession,
     directory: str | None = None,
@@ -120,8 +134,14 @@ async def ingest_pdf_directory(
                     source_id=source.id,
                     content=chunk_data["content"],
                     embedding=embedding,
+                    embedding_ann=truncate_embedding(embedding),
+                    embedding_bin=binary_quantize(embedding),
                     chunk_index=chunk_data["chunk_index"],
                     page_number=chunk_data.get("page_number"),
+                    speaker=source.speaker,
+                    sermon_date=source.sermon_date,
+                    source_type=source.source_type,
+                    sermon_number=source.sermon_number,
                     metadata_=chunk_data.get("metadata", {}),
                 )
                 db.add(chunk)
@@ -140,6 +160,7 @@ async def ingest_pdf_directory(
             stats["errors"].append(f"{os.path.basename(pdf_path)}: {str(e)}")
             await db.rollback()
 
+    await _after_ingestion(db, stats)
     return stats
 
 
@@ -228,8 +249,14 @@ async def ingest_youtube_urls(
                     source_id=source.id,
                     content=chunk_data["content"],
                     embedding=embedding,
+                    embedding_ann=truncate_embedding(embedding),
+                    embedding_bin=binary_quantize(embedding),
                     chunk_index=chunk_data["chunk_index"],
                     timestamp_start=chunk_data.get("timestamp_start"),
+                    speaker=source.speaker,
+                    sermon_date=source.sermon_date,
+                    source_type=source.source_type,
+                    sermon_number=source.sermon_number,
                     metadata_=chunk_data.get("metadata", {}),
                 )
                 db.add(chunk)
@@ -246,6 +273,7 @@ async def ingest_youtube_urls(
             stats["errors"].append(f"{url}: {str(e)}")
             await db.rollback()
 
+    await _after_ingestion(db, stats)
     return stats
 
 
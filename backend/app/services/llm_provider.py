@@ -1,8 +1,34 @@
 """Unified LLM provider — abstracts OpenAI, Anthropic (Claude), and Google (Gemini)
-behind a single interface for chat completions and streaming."""
-
+behind a single interface for chat completions and streaming.
+
+Each provider has a synchronous client (scripts, background jobs) and an async
+client for the request path (``achat_completion``), so LLM calls never block the
+event loop. Async clients are created once per process and share keep-alive
+connection pools.
+
+Prompt caching: a message may carry ``"cache": True`` to mark the end of a
+stable prefix (the system instructions, the conversation so far). Anthropic
+gets an explicit ``cache_control`` breakpoint there; OpenAI and Gemini cache
+matching prefixes implicitly, so the marker is just dropped. Pass a ``usage``
+dict to the async calls to get prompt/completion/cached token counts back.
+
+Failover: the async calls go through a router. If ``llm_fallback_provider``
+is set and the primary hasn't answered (or, when streaming, produced its first
+token) within its recent p95 latency, a hedged request goes to the fallback
+and the first to respond wins. Each provider has a circuit breaker; while a
+provider's circuit is open its traffic goes straight to the other one, and a
+primary beaten by its hedge counts as a failure. Answer, mini-model and
+first-token latencies are tracked separately per provider. Router
+and breaker state is per worker process (``llm_router_state``).
+"""
+
+import asyncio
+import functools
 import logging
-from typing import Generator
+import time
+from collections import deque
+from typing import AsyncGenerator, Generator
+import httpx
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -17,11 +43,64 @@ MINI_MODELS = {
 }
 
 
+# Default model per provider when it serves as the fallback
+DEFAULT_MODELS = {
+    "openai": "gpt-4o",
+    "anthropic": "claude-sonnet-4-5",
+    "google": "gemini-2.5-flash",
+}
+
+
 def _get_mini_model() -> str:
     """Return the lightweight model for the current provider."""
     return MINI_MODELS.get(settings.llm_provider, settings.llm_mini_model)
 
 
+# ─── Token usage ───
+_usage_totals = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "cache_write_tokens": 0, "completion_tokens": 0}
+
+
+def _record_usage(usage: dict | None, prompt: int | None, completion: int | None,
+                  cached: int | None = None, cache_write: int | None = None) -> None:
+    """Fill the caller's usage dict and the process-wide totals."""
+    counts = {
+        "prompt_tokens": prompt or 0,
+        "cached_tokens": cached or 0,
+        "cache_write_tokens": cache_write or 0,
+        "completion_tokens": completion or 0,
+    }
+    _usage_totals["requests"] += 1
+    for key, value in counts.items():
+        _usage_totals[key] += value
+    if usage is not None:
+        usage.update(counts)
+
+
+def prompt_cache_stats() -> dict:
+    """Process-wide token totals since startup, with the share of prompt tokens read from cache."""
+    prompt = _usage_totals["prompt_tokens"]
+    return {
+        **_usage_totals,
+        "cached_ratio": round(_usage_totals["cached_tokens"] / prompt, 4) if prompt else 0.0,
+    }
+
+
+def _plain_messages(messages: list[dict]) -> list[dict]:
+    """Strip our cache markers for providers that only accept role/content."""
+    return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+def _pooled_http_client() -> httpx.AsyncClient:
+    """Keep-alive connection pool for an async provider client."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+        ),
+        timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=10.0),
+    )
+
+
 # ─────────────────────────────────────────────
 # OpenAI
 # ─────────────────────────────────────────────
@@ -31,36 +110,93 @@ def _get_openai():
     global _openai_client
     if _openai_client is None:
         from openai import OpenAI
-        _openai_client = OpenAI(api_key=settings.openai_api_key)
+        _openai_client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None)
     return _openai_client
 
 
+_openai_async_client = None
+
+def _get_openai_async():
+    global _openai_async_client
+    if _openai_async_client is None:
+        from openai import AsyncOpenAI
+        _openai_async_client = AsyncOpenAI(
+            api_key=settings.openai_api_key, base_url=settings.openai_base_url or None,
+            http_client=_pooled_http_client(),
+        )
+    return _openai_async_client
+
+
+def _openai_kwargs(messages: list[dict], model: str | None, temperature: float | None,
+                   max_tokens: int | None, stream: bool) -> dict:
+    kwargs = {
+        "model": model or settings.llm_model,
+        "messages": _plain_messages(messages),
+        "temperature": temperature if temperature is not None else settings.llm_temperature,
+        "max_completion_tokens": max_tokens or settings.llm_max_tokens,
+        "stream": stream,
+    }
+    if stream:
+        kwargs["stream_options"] = {"include_usage": True}  # Final chunk carries usage
+    return kwargs
+
+
+def _openai_usage(usage: dict | None, response_usage) -> None:
+    if response_usage is None:
+        return
+    details = getattr(response_usage, "prompt_tokens_details", None)
+    _record_usage(
+        usage,
+        prompt=response_usage.prompt_tokens,
+        completion=response_usage.completion_tokens,
+        cached=getattr(details, "cached_tokens", None),
+    )
+
+
 def _openai_chat(messages: list[dict], model: str | None = None,
                  temperature: float | None = None, max_tokens: int | None = None,
                  stream: bool = False):
     client = _get_openai()
-    model = model or settings.llm_model
-    temperature = temperature if temperature is not None else settings.llm_temperature
-    max_tokens = max_tokens or settings.llm_max_tokens
-
     response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        max_completion_tokens=max_tokens,
-        stream=stream,
+        **_openai_kwargs(messages, model, temperature, max_tokens, stream)
     )
     if stream:
         return response  # Returns iterator
     return response.choices[0].message.content
 
 
+async def _openai_achat(messages: list[dict], model: str | None = None,
+                        temperature: float | None = None, max_tokens: int | None = None,
+                        usage: dict | None = None) -> str:
+    client = _get_openai_async()
+    response = await client.chat.completions.create(
+        **_openai_kwargs(messages, model, temperature, max_tokens, stream=False)
+    )
+    _openai_usage(usage, response.usage)
+    return response.choices[0].message.content
+
+
 def _openai_stream_tokens(stream) -> Generator[str, None, None]:
     for chunk in stream:
-        if chunk.choices[0].delta.content:
+        if chunk.choices and chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
 
 
+async def _openai_astream(messages: list[dict], model: str | None = None,
+                          temperature: float | None = None,
+                          max_tokens: int | None = None,
+                          usage: dict | None = None) -> AsyncGenerator[str, None]:
+    client = _get_openai_async()
+    stream = await client.chat.completions.create(
+        **_openai_kwargs(messages, model, temperature, max_tokens, stream=True)
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if chunk.usage:
+            _openai_usage(usage, chunk.usage)
+
+
 # ─────────────────────────────────────────────
 # Anthropic (Claude)
 # ─────────────────────────────────────────────
@@ -70,26 +206,47 @@ def _get_anthropic():
     global _anthropic_client
     if _anthropic_client is None:
         import anthropic
-        _anthropic_client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+        _anthropic_client = anthropic.Anthropic(
+            api_key=settings.anthropic_api_key, base_url=settings.anthropic_base_url or None,
+        )
     return _anthropic_client
 
 
-def _anthropic_chat(messages: list[dict], model: str | None = None,
-                    temperature: float | None = None, max_tokens: int | None = None,
-                    stream: bool = False):
-    client = _get_anthropic()
+_anthropic_async_client = None
+
+def _get_anthropic_async():
+    global _anthropic_async_client
+    if _anthropic_async_client is None:
+        import anthropic
+        _anthropic_async_client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key, base_url=settings.anthropic_base_url or None,
+            http_client=_pooled_http_client(),
+        )
+    return _anthropic_async_client
+
+
+def _anthropic_kwargs(messages: list[dict], model: str | None, temperature: float | None,
+                      max_tokens: int | None) -> dict:
     model = model or settings.llm_model
     temperature = temperature if temperature is not None else settings.llm_temperature
     max_tokens = max_tokens or settings.llm_max_tokens
 
-    # Anthropic separates system from messages
+    # Anthropic separates system from messages; cache-marked blocks get a breakpoint
+    cache_control = {"type": "ephemeral"} if settings.llm_prompt_caching else None
     system_msg = ""
     chat_messages = []
     for msg in messages:
         if msg["role"] == "system":
             system_msg = msg["content"]
+            if cache_control and msg.get("cache"):
+                system_msg = [{"type": "text", "text": msg["content"], "cache_control": cache_control}]
+        elif cache_control and msg.get("cache"):
+            chat_messages.append({
+                "role": msg["role"],
+                "content": [{"type": "text", "text": msg["content"], "cache_control": cache_control}],
+            })
         else:
-            chat_messages.append(msg)
+            chat_messages.append({"role": msg["role"], "content": msg["content"]})
 
     kwargs = {
         "model": model,
@@ -99,20 +256,62 @@ def _anthropic_chat(messages: list[dict], model: str | None = None,
     }
     if system_msg:
         kwargs["system"] = system_msg
+    return kwargs
+
+
+def _anthropic_chat(messages: list[dict], model: str | None = None,
+                    temperature: float | None = None, max_tokens: int | None = None,
+                    stream: bool = False):
+    client = _get_anthropic()
+    kwargs = _anthropic_kwargs(messages, model, temperature, max_tokens)
 
     if stream:
         return client.messages.stream(**kwargs)
-    
+
     response = client.messages.create(**kwargs)
     return response.content[0].text
 
 
+def _anthropic_usage(usage: dict | None, response_usage) -> None:
+    # input_tokens excludes cache reads and writes; report the full prompt size
+    cached = getattr(response_usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(response_usage, "cache_creation_input_tokens", None) or 0
+    _record_usage(
+        usage,
+        prompt=response_usage.input_tokens + cached + cache_write,
+        completion=response_usage.output_tokens,
+        cached=cached,
+        cache_write=cache_write,
+    )
+
+
+async def _anthropic_achat(messages: list[dict], model: str | None = None,
+                           temperature: float | None = None, max_tokens: int | None = None,
+                           usage: dict | None = None) -> str:
+    client = _get_anthropic_async()
+    response = await client.messages.create(**_anthropic_kwargs(messages, model, temperature, max_tokens))
+    _anthropic_usage(usage, response.usage)
+    return response.content[0].text
+
+
 def _anthropic_stream_tokens(stream) -> Generator[str, None, None]:
     with stream as s:
         for text in s.text_stream:
             yield text
 
 
+async def _anthropic_astream(messages: list[dict], model: str | None = None,
+                             temperature: float | None = None,
+                             max_tokens: int | None = None,
+                             usage: dict | None = None) -> AsyncGenerator[str, None]:
+    client = _get_anthropic_async()
+    async with client.messages.stream(**_anthropic_kwargs(messages, model, temperature, max_tokens)) as s:
+        async for text in s.text_stream:
+            yield text
+        final = await s.get_final_message()
+        _anthropic_usage(usage, final.usage)
+
+
 # ─────────────────────────────────────────────
 # Google (Gemini)
 # ─────────────────────────────────────────────
@@ -122,14 +321,15 @@ def _get_google():
     global _google_client
     if _google_client is None:
         from google import genai
-        _google_client = genai.Client(api_key=settings.google_api_key)
+        from google.genai import types
+        http_options = types.HttpOptions(base_url=settings.google_base_url) if settings.google_base_url else None
+        _google_client = genai.Client(api_key=settings.google_api_key, http_options=http_options)
     return _google_client
 
 
-def _google_chat(messages: list[dict], model: str | None = None,
-                 temperature: float | None = None, max_tokens: int | None = None,
-                 stream: bool = False):
-    client = _get_google()
+def _google_request(messages: list[dict], model: str | None, temperature: float | None,
+                    max_tokens: int | None) -> dict:
+    """Build generate_content kwargs (model, contents, config) from OpenAI-format messages."""
     from google.genai import types
     model = model or settings.llm_model
     temperature = temperature if temperature is not None else settings.llm_temperature
@@ -174,31 +374,317 @@ def _google_chat(messages: list[dict], model: str | None = None,
     if system_instruction:
         config.system_instruction = system_instruction
 
+    return {"model": model, "contents": contents, "config": config}
+
+
+def _google_chat(messages: list[dict], model: str | None = None,
+                 temperature: float | None = None, max_tokens: int | None = None,
+                 stream: bool = False):
+    client = _get_google()
+    request = _google_request(messages, model, temperature, max_tokens)
+
     if stream:
-        return client.models.generate_content_stream(
-            model=model,
-            contents=contents,
-            config=config,
-        )
+        return client.models.generate_content_stream(**request)
 
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=config,
+    response = client.models.generate_content(**request)
+    return response.text
+
+
+def _google_usage(usage: dict | None, metadata) -> None:
+    if metadata is None:
+        return
+    _record_usage(
+        usage,
+        prompt=metadata.prompt_token_count,
+        completion=metadata.candidates_token_count,
+        cached=metadata.cached_content_token_count,
     )
+
+
+async def _google_achat(messages: list[dict], model: str | None = None,
+                        temperature: float | None = None, max_tokens: int | None = None,
+                        usage: dict | None = None) -> str:
+    # client.aio shares the sync client's configuration but uses its own async transport
+    client = _get_google()
+    response = await client.aio.models.generate_content(
+        **_google_request(messages, model, temperature, max_tokens)
+    )
+    _google_usage(usage, response.usage_metadata)
     return response.text
 
 
+def _google_chunk_tokens(chunk) -> list[str]:
+    tokens = []
+    if chunk.text:
+        tokens.append(chunk.text)
+
+    # If the model abruptly finishes for a reason other than STOP or MAX_TOKENS, yield the error
+    if chunk.candidates and chunk.candidates[0].finish_reason:
+        reason = chunk.candidates[0].finish_reason
+        if reason not in ("STOP", "MAX_TOKENS", 1, 2):  # 1 is STOP, 2 is MAX_TOKENS in some enum versions
+            tokens.append(f"\n\n[Warning: Gemini stopped generating due to: {reason}]")
+    return tokens
+
+
 def _google_stream_tokens(stream) -> Generator[str, None, None]:
     for chunk in stream:
-        if chunk.text:
-            yield chunk.text
+        yield from _google_chunk_tokens(chunk)
+
 
-        # If the model abruptly finishes for a reason other than STOP or MAX_TOKENS, yield the error
-        if chunk.candidates and chunk.candidates[0].finish_reason:
-            reason = chunk.candidates[0].finish_reason
-            if reason not in ("STOP", "MAX_TOKENS", 1, 2):  # 1 is STOP, 2 is MAX_TOKENS in some enum versions
-                yield f"\n\n[Warning: Gemini stopped generating due to: {reason}]"
+async def _google_astream(messages: list[dict], model: str | None = None,
+                          temperature: float | None = None,
+                          max_tokens: int | None = None,
+                          usage: dict | None = None) -> AsyncGenerator[str, None]:
+    client = _get_google()
+    stream = await client.aio.models.generate_content_stream(
+        **_google_request(messages, model, temperature, max_tokens)
+    )
+    metadata = None
+    async for chunk in stream:
+        for token in _google_chunk_tokens(chunk):
+            yield token
+        metadata = chunk.usage_metadata or metadata  # Cumulative; the last chunk has the totals
+    _google_usage(usage, metadata)
+
+
+# ─────────────────────────────────────────────
+# Provider router (hedging + circuit breakers)
+# ─────────────────────────────────────────────
+_LATENCY_WINDOW = 200
+_MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitBreaker:
+    """Per-provider breaker: closed → open after N consecutive failures →
+    half-open after ``llm_breaker_reset_seconds`` (one probe) → closed on success."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.lost_races = 0
+        # Latency per kind of call ("complete", "mini", "stream" time-to-first-token),
+        # kept apart so fast mini-model calls don't drag down the answer p95
+        self.latencies: dict[str, deque] = {}
+
+    def _reset_due(self) -> bool:
+        return self.state == "open" and time.monotonic() - self.opened_at >= settings.llm_breaker_reset_seconds
+
+    def is_available(self) -> bool:
+        """Whether ``allow`` would let a request through now, without claiming anything."""
+        if self.state == "closed" or self._reset_due():
+            return True
+        return self.state == "half_open" and not self.probe_in_flight
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. Claims the probe slot when half-open,
+        so call it only for a request that is actually being sent."""
+        if self._reset_due():
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """The request was cancelled — neither success nor failure."""
+        self.probe_in_flight = False
+
+    def record_success(self, latency: float, kind: str) -> None:
+        self.latencies.setdefault(kind, deque(maxlen=_LATENCY_WINDOW)).append(latency)
+        if latency > settings.llm_breaker_slow_seconds:
+            self.record_failure()
+            return
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        if self.state != "closed":
+            logger.info("LLM circuit for %s closed", self.provider)
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or (
+            self.state == "closed" and self.consecutive_failures >= settings.llm_breaker_failure_threshold
+        ):
+            logger.warning("LLM circuit for %s opened after %d failures", self.provider, self.consecutive_failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_lost_race(self) -> None:
+        """Beaten by a hedge. Counts as a failure, so a provider that is
+        consistently slower than its fallback eventually opens its circuit."""
+        self.lost_races += 1
+        self.record_failure()
+
+    def p95(self, kind: str) -> float | None:
+        samples = self.latencies.get(kind, ())
+        if len(samples) < _MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def snapshot(self) -> dict:
+        p95 = {kind: self.p95(kind) for kind in ("complete", "mini", "stream")}
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "lost_races": self.lost_races,
+            **{
+                name: round(p95[kind], 3) if p95[kind] is not None else None
+                for name, kind in (
+                    ("p95_seconds", "complete"),
+                    ("p95_mini_seconds", "mini"),
+                    ("p95_first_token_seconds", "stream"),
+                )
+            },
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_router_stats = {"hedges": 0, "hedge_wins": 0, "failovers": 0}
+
+
+def _breaker(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(provider)
+    return _breakers[provider]
+
+
+def _hedge_delay(provider: str, kind: str) -> float:
+    observed = _breaker(provider).p95(kind)
+    delay = observed if observed is not None else settings.llm_hedge_delay_seconds
+    return max(delay, settings.llm_hedge_min_delay_seconds)
+
+
+def _routes(model: str | None, use_mini: bool) -> list[tuple[str, str | None]]:
+    """[(provider, model)] in preference order: the primary, then the fallback if configured.
+
+    An explicit ``model`` belongs to the primary provider; the fallback uses
+    ``llm_fallback_model`` or its own default (or mini) model.
+    """
+    primary = settings.llm_provider
+    routes = [(primary, _get_mini_model() if use_mini else model)]
+    fallback = settings.llm_fallback_provider
+    if fallback and fallback != primary:
+        if use_mini:
+            fallback_model = MINI_MODELS.get(fallback)
+        else:
+            fallback_model = settings.llm_fallback_model or DEFAULT_MODELS.get(fallback)
+        routes.append((fallback, fallback_model))
+    return routes
+
+
+async def _attempt(provider: str, kind: str, factory):
+    """Run one provider request, feeding the outcome to its breaker."""
+    breaker = _breaker(provider)
+    start = time.monotonic()
+    try:
+        result = await factory()
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        breaker.record_failure()
+        logger.warning("LLM request to %s failed: %s", provider, e)
+        raise
+    breaker.record_success(time.monotonic() - start, kind)
+    return result
+
+
+async def _race(kind: str, attempts: list[tuple[str, object]], discard=None):
+    """Return (provider, result) from the first attempt to succeed.
+
+    ``attempts`` is [(provider, factory)] in preference order. Providers whose
+    circuit is open are skipped (unless none is left). The second attempt is
+    started when the first fails or has not finished within its hedge delay.
+    Losing attempts are cancelled, and a primary beaten by the hedge is counted
+    against its breaker. ``discard`` is awaited with the result of any loser
+    that finished anyway (e.g. to close its stream).
+    """
+    allowed = [a for a in attempts if _breaker(a[0]).is_available()]
+    forced = not allowed
+    if forced:
+        allowed = attempts[:1]  # Everything is open: try the primary anyway
+    elif allowed[0][0] != attempts[0][0]:
+        _router_stats["failovers"] += 1
+        logger.info("LLM circuit for %s is open, routing to %s", attempts[0][0], allowed[0][0])
+
+    pending = list(allowed)
+    tasks: dict[asyncio.Task, tuple[str, str]] = {}  # task → (provider, why it was launched)
+
+    def launch(reason: str, force: bool = False) -> bool:
+        # The breaker is only claimed here, for a request actually sent; one that
+        # closed again since the race started is skipped
+        while pending:
+            provider, factory = pending.pop(0)
+            if force or _breaker(provider).allow():
+                tasks[asyncio.create_task(_attempt(provider, kind, factory))] = (provider, reason)
+                return True
+        return False
+
+    launch("first", force=forced)
+    hedge_at = time.monotonic() + _hedge_delay(allowed[0][0], kind)
+    error: Exception | None = None
+    winner: str | None = None
+    try:
+        while tasks:
+            timeout = None
+            if pending and settings.llm_hedge_enabled:
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                _router_stats["hedges"] += 1
+                logger.info("LLM %s slower than %.1fs, hedging to %s", allowed[0][0],
+                            _hedge_delay(allowed[0][0], kind), pending[0][0])
+                launch("hedge")
+                continue
+            for task in done:
+                if task.exception() is None:
+                    provider, winner = tasks.pop(task)
+                    if winner == "hedge":
+                        _router_stats["hedge_wins"] += 1
+                    return provider, task.result()
+            for task in done:
+                tasks.pop(task)
+                error = task.exception()
+            if pending and not tasks:
+                _router_stats["failovers"] += 1
+                launch("failover")  # The first attempt failed outright — fail over now
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for (provider, reason), result in zip(tasks.values(), results):
+                if isinstance(result, asyncio.CancelledError):
+                    if winner == "hedge" and reason == "first":
+                        _breaker(provider).record_lost_race()
+                elif not isinstance(result, BaseException) and discard is not None:
+                    await discard(result)  # Finished alongside the winner
+
+
+def llm_router_state() -> dict:
+    """Routing configuration, hedge counters and per-provider breaker state."""
+    return {
+        "primary": settings.llm_provider,
+        "fallback": settings.llm_fallback_provider or None,
+        "hedge_enabled": settings.llm_hedge_enabled,
+        **_router_stats,
+        "providers": {name: breaker.snapshot() for name, breaker in _breakers.items()},
+    }
 
 
 # ─────────────────────────────────────────────
@@ -239,6 +725,40 @@ def chat_completion(
         raise ValueError(f"Unknown LLM provider: {provider}")
 
 
+_ACHAT = {"openai": _openai_achat, "anthropic": _anthropic_achat, "google": _google_achat}
+_ASTREAM = {"openai": _openai_astream, "anthropic": _anthropic_astream, "google": _google_astream}
+
+
+async def achat_completion(
+    messages: list[dict],
+    model: str | None = None,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    use_mini: bool = False,
+    usage: dict | None = None,
+) -> str:
+    """Async counterpart of chat_completion, for use on the request path.
+
+    Routed through the hedging/circuit-breaker router. If ``usage`` is given
+    it is filled with prompt_tokens, cached_tokens, cache_write_tokens and
+    completion_tokens for this call, plus the provider that answered.
+    """
+    routes = _routes(model, use_mini)
+    usages = {provider: {} for provider, _ in routes}
+    attempts = []
+    for provider, provider_model in routes:
+        if provider not in _ACHAT:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        attempts.append((provider, functools.partial(
+            _ACHAT[provider], messages, provider_model, temperature, max_tokens, usages[provider],
+        )))
+
+    provider, answer = await _race("mini" if use_mini else "complete", attempts)
+    if usage is not None:
+        usage.update(usages[provider], provider=provider)
+    return answer
+
+
 def chat_completion_stream(
     messages: list[dict],
     model: str | None = None,
@@ -262,3 +782,54 @@ def chat_completion_stream(
         yield from _google_stream_tokens(stream)
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+async def achat_completion_stream(
+    messages: list[dict],
+    model: str | None = None,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    usage: dict | None = None,
+) -> AsyncGenerator[str, None]:
+    """Async counterpart of chat_completion_stream.
+
+    Awaits each provider token on the event loop, so other requests keep
+    being served while a stream is waiting. Hedging races time-to-first-token;
+    once a provider has produced a token the stream is committed to it.
+    ``usage`` is filled once the stream has been consumed to the end.
+    """
+    routes = _routes(model, use_mini=False)
+    usages = {provider: {} for provider, _ in routes}
+    for provider, _ in routes:
+        if provider not in _ASTREAM:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+    async def open_stream(provider: str, provider_model: str | None):
+        stream = _ASTREAM[provider](messages, provider_model, temperature, max_tokens, usages[provider])
+        try:
+            return stream, await stream.__anext__()
+        except StopAsyncIteration:
+            return stream, None
+        except BaseException:
+            await stream.aclose()
+            raise
+
+    async def close_stream(opened) -> None:
+        await opened[0].aclose()
+
+    provider, (stream, first) = await _race(
+        "stream", [(p, functools.partial(open_stream, p, m)) for p, m in routes], discard=close_stream,
+    )
+    try:
+        if first is not None:
+            yield first
+            async for token in stream:
+                yield token
+    except Exception:
+        _breaker(provider).record_failure()  # Failed mid-stream, after winning the race
+        raise
+    finally:
+        await stream.aclose()
+
+    if usage is not None:
+        usage.update(usages[provider], provider=provider)
@@ -1,321 +1,870 @@
 """RAG query engine — retrieves relevant sermon chunks and generates
 grounded answers with source citations via the configured LLM provider."""
 
+import asyncio
+import json
 import logging
 import time
-from sqlalchemy import select, text
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time as dt_time, timedelta
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import SermonChunk, SermonSource
-from app.services.embedder import generate_single_embedding
-from app.services.query_rewriter import rewrite_query
+from app.database import async_session
+from app.services.context_builder import BuiltContext, build_context
+from app.services.corpus import get_corpus_version, get_source_metadata, match_speakers
+from app.services.answer_cache import lookup_answer, store_answer
+from app.services.cache import TTLCache, run_in_background
+from app.services.embedder import embed_query, truncate_embedding
+from app.services.query_rewriter import needs_rewrite, rewrite_query
 from app.services.reranker import rerank_chunks
-from app.services.llm_provider import chat_completion, chat_completion_stream
+from app.services.timing import DEGRADED, record_stage, stage, start_timings
+from app.services.vector_index import search_vector_index
+from app.services.llm_provider import achat_completion, achat_completion_stream
+from app.models import SourceType
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+# Static instructions only, so the system message is a byte-identical prefix
+# across requests that providers can cache. The retrieved excerpts go into the
+# final user turn (CONTEXT_TEMPLATE), after the conversation history.
 SYSTEM_PROMPT = """You are a knowledgeable theological assistant for GRII (Gereja Reformed Injili Indonesia / Indonesian Reformed Evangelical Church). You help church members find answers from past sermon transcripts.
 
 CRITICAL RULES:
-1. Answer ONLY based on the sermon excerpts provided in the context below. Do not fabricate or add information not found in the excerpts.
+1. Answer ONLY based on the sermon excerpts provided with the question. Do not fabricate or add information not found in the excerpts.
 2. If the context doesn't contain relevant information, say so honestly — do not make up an answer.
 3. Always cite which sermon(s) your answer comes from using the format [Sermon Number - Title/Speaker].
 4. Be warm, pastoral, and encouraging in tone — you are serving a church community.
 5. When referencing Bible verses mentioned in the sermons, you may provide additional context about those verses since you know the Bible well.
 6. ALWAYS respond in Indonesian (Bahasa Indonesia), even if the user asks their question in English. This is an Indonesian church application.
 7. Structure longer answers with clear paragraphs and bullet points for readability.
+"""
 
-CONTEXT FROM SERMON TRANSCRIPTS:
+CONTEXT_TEMPLATE = """CONTEXT FROM SERMON TRANSCRIPTS:
 {context}
-"""
 
+QUESTION:
+{question}"""
 
-async def retrieve_relevant_chunks(
-    db: AsyncSession,
-    query: str,
-    top_k: int | None = None,
-) -> list[dict]:
-    """Retrieve relevant sermon chunks using hybrid search (vector + full-text).
-    
-    Combines pgvector cosine similarity with PostgreSQL full-text search
-    using Reciprocal Rank Fusion (RRF) for score merging.
-    """
-    top_k = top_k or settings.retrieval_top_k
-    rrf_k = 60  # RRF constant
-
-    # Generate query embedding
-    query_embedding = generate_single_embedding(query)
-    embedding_str = str(query_embedding)
 
-    # --- Vector search (semantic) ---
-    vec_result = await db.execute(
-        text("""
-            SELECT
+# Columns every retrieval query returns for a chunk
+_CHUNK_COLUMNS = """
                 sc.id,
                 sc.source_id,
                 sc.content,
                 sc.chunk_index,
                 sc.page_number,
                 sc.timestamp_start,
-                sc.metadata,
-                1 - (sc.embedding <=> CAST(:query_embedding AS vector)) AS similarity
-            FROM sermon_chunks sc
-            ORDER BY sc.embedding <=> CAST(:query_embedding AS vector)
-            LIMIT :fetch_k
-        """),
-        {"query_embedding": embedding_str, "fetch_k": top_k * 2},
-    )
-    vec_rows = vec_result.mappings().all()
+                sc.metadata"""
 
-    # --- Full-text search (keyword / BM25-like) ---
-    fts_result = await db.execute(
-        text("""
-            SELECT
-                sc.id,
-                sc.source_id,
-                sc.content,
-                sc.chunk_index,
-                sc.page_number,
-                sc.timestamp_start,
-                sc.metadata,
-                ts_rank_cd(to_tsvector('simple', sc.content), plainto_tsquery('simple', :query)) AS fts_rank
-            FROM sermon_chunks sc
-            WHERE to_tsvector('simple', sc.content) @@ plainto_tsquery('simple', :query)
-            ORDER BY fts_rank DESC
-            LIMIT :fetch_k
-        """),
-        {"query": query, "fetch_k": top_k * 2},
-    )
-    fts_rows = fts_result.mappings().all()
 
-    # --- Reciprocal Rank Fusion ---
+# Filter columns per table. The sermon_chunks columns are copies of the
+# sermon_sources ones (see corpus.sync_chunk_metadata).
+_FILTER_COLUMNS = {
+    "chunks": {"speaker": "sc.speaker", "source_type": "sc.source_type",
+               "sermon_date": "sc.sermon_date", "sermon_number": "sc.sermon_number"},
+    "sources": {"speaker": "ss.speaker", "source_type": "ss.source_type",
+                "sermon_date": "ss.sermon_date", "sermon_number": "ss.sermon_number"},
+}
+
+
+@dataclass
+class RetrievalFilters:
+    """Sermon metadata restrictions applied inside every retrieval query.
+
+    They become predicates on the columns copied onto ``sermon_chunks``, each
+    served by a btree index, so a filtered search reads only matching chunks.
+    """
+    speaker: str | None = None  # Case-insensitive part of the name
+    source_type: SourceType | None = None
+    date_from: date | None = None  # Inclusive
+    date_to: date | None = None  # Inclusive
+    sermon_number: str | None = None
+    speakers: list[str] | None = None  # Exact names; retrieval resolves ``speaker`` into these
+
+    def __bool__(self) -> bool:
+        return any(v is not None for v in (
+            self.speaker, self.source_type, self.date_from, self.date_to, self.sermon_number, self.speakers,
+        ))
+
+    def sql(self, table: str = "chunks") -> tuple[str, dict]:
+        """A predicate and its bind params; ("TRUE", {}) if empty.
+
+        ``table`` is "chunks" (``sc``, sermon_chunks) or "sources" (``ss``, sermon_sources).
+        """
+        column = _FILTER_COLUMNS[table]
+        conditions, params = [], {}
+        if self.speakers is not None:
+            conditions.append(f"{column['speaker']} = ANY(CAST(:f_speakers AS varchar[]))")
+            params["f_speakers"] = self.speakers
+        if self.source_type:
+            conditions.append(f"{column['source_type']} = CAST(:f_source_type AS sourcetype)")
+            params["f_source_type"] = SourceType(self.source_type).name  # Stored by enum name
+        if self.date_from:
+            conditions.append(f"{column['sermon_date']} >= :f_date_from")
+            params["f_date_from"] = datetime.combine(self.date_from, dt_time.min)
+        if self.date_to:
+            conditions.append(f"{column['sermon_date']} < :f_date_to")
+            params["f_date_to"] = datetime.combine(self.date_to + timedelta(days=1), dt_time.min)
+        if self.sermon_number:
+            conditions.append(f"{column['sermon_number']} = :f_sermon_number")
+            params["f_sermon_number"] = self.sermon_number
+        return (" AND ".join(conditions), params) if conditions else ("TRUE", {})
+
+
+# Vector backends: each SQL yields (id, cosine distance to the full-precision
+# query vector) for the nearest :fetch_k chunks, nearest first. ``{where}``
+# takes the RetrievalFilters predicate. Filtered searches pick a backend from
+# the filter's selectivity (see _filtered_backend): "exact" ranks just the
+# index-selected chunks, which is cheapest for narrow filters; broad filters
+# use the ANN backend with an iterative scan so it keeps searching until
+# enough candidates pass the filter.
+_VECTOR_RANKING_SQL = {
+    # Exact scan over the full 3072-dim vectors
+    "exact": """
+            SELECT sc.id, sc.embedding <=> CAST(:query_embedding AS vector) AS distance
+            FROM sermon_chunks sc{where}
+            ORDER BY sc.embedding <=> CAST(:query_embedding AS vector)
+            LIMIT :fetch_k""",
+    # HNSW ANN over the truncated halfvec column, re-scored exactly
+    "hnsw": """
+            SELECT cand.id, full_sc.embedding <=> CAST(:query_embedding AS vector) AS distance
+            FROM (
+                SELECT sc.id
+                FROM sermon_chunks sc{where}
+                ORDER BY sc.embedding_ann <=> CAST(:query_ann AS halfvec)
+                LIMIT :candidate_k
+            ) AS cand
+            JOIN sermon_chunks full_sc ON full_sc.id = cand.id
+            ORDER BY distance
+            LIMIT :fetch_k""",
+    # Hamming-distance prefilter over 1-bit codes (HNSW, bit_hamming_ops), re-scored exactly
+    "binary": """
+            SELECT cand.id, full_sc.embedding <=> CAST(:query_embedding AS vector) AS distance
+            FROM (
+                SELECT sc.id
+                FROM sermon_chunks sc{where}
+                ORDER BY sc.embedding_bin <~> binary_quantize(CAST(:query_embedding AS vector))
+                LIMIT :candidate_k
+            ) AS cand
+            JOIN sermon_chunks full_sc ON full_sc.id = cand.id
+            ORDER BY distance
+            LIMIT :fetch_k""",
+    # Ranked in-process by the memory-mapped index; Postgres only joins the ids
+    "mmap": """
+            SELECT v.id, v.distance
+            FROM unnest(CAST(:vec_ids AS integer[]), CAST(:vec_distances AS float8[])) AS v(id, distance)""",
+}
+
+
+_HNSW_MAX_EF_SEARCH = 1000  # pgvector's upper bound for hnsw.ef_search
+
+# Matching-chunk estimates per (filters, corpus version); the version in the key
+# invalidates them, the TTL only bounds memory
+_estimate_cache = TTLCache(1024, 3600)
+
+
+async def _filtered_chunk_estimate(db: AsyncSession, filters: RetrievalFilters) -> int:
+    """Chunks matching ``filters``, summed from ``sermon_sources.chunk_count``.
+
+    Memoised per (filters, corpus version), so repeated filters cost no query.
+    """
+    filter_sql, params = filters.sql("sources")
+    key = (filter_sql, json.dumps(params, sort_keys=True, default=str), await get_corpus_version(db))
+    estimate = _estimate_cache.get(key)
+    if estimate is None:
+        result = await db.execute(
+            text(f"SELECT COALESCE(SUM(ss.chunk_count), 0) FROM sermon_sources ss WHERE {filter_sql}"),
+            params,
+        )
+        estimate = int(result.scalar() or 0)
+        _estimate_cache.set(key, estimate)
+    return estimate
+
+
+async def _filtered_backend(db: AsyncSession, filters: RetrievalFilters) -> str:
+    """Vector backend for a filtered search.
+
+    With ``settings.filtered_vector_backend == "auto"``, filters matching at most
+    ``settings.filtered_exact_max_chunks`` chunks are ranked exactly; broader
+    ones use ``settings.vector_backend``, as they would read more rows exactly
+    than the unfiltered ANN search does.
+    """
+    if settings.filtered_vector_backend != "auto":
+        return settings.filtered_vector_backend
+    if await _filtered_chunk_estimate(db, filters) <= settings.filtered_exact_max_chunks:
+        return "exact"
+    return settings.vector_backend
+
+
+async def _vector_ranking(
+    db: AsyncSession, query_embedding: list[float], fetch_k: int, filters: RetrievalFilters | None = None,
+) -> tuple[str, dict]:
+    """SQL and bind params for the configured vector backend's ranking.
+
+    For hnsw and binary (both served by an HNSW index) it also widens
+    ``hnsw.ef_search`` for the rest of ``db``'s transaction: HNSW returns at
+    most ef_search rows, which would otherwise silently cap the oversampled
+    candidate set. Filtered searches, and candidate sets beyond pgvector's
+    ef_search limit, also turn on ``settings.ann_iterative_scan``.
+    """
+    backend = await _filtered_backend(db, filters) if filters else settings.vector_backend
+    if backend not in _VECTOR_RANKING_SQL:
+        raise ValueError(f"Unknown vector backend: {backend}")
+
+    if backend == "mmap" and not filters:
+        hits = await asyncio.to_thread(search_vector_index, query_embedding, fetch_k)  # CPU-bound scan
+        if hits is not None:
+            return _VECTOR_RANKING_SQL[backend], {
+                "vec_ids": [chunk_id for chunk_id, _ in hits],
+                "vec_distances": [1 - similarity for _, similarity in hits],
+            }
+    if backend == "mmap":
+        backend = "exact"  # No snapshot built yet, or filters the in-process index can't apply
+
+    filter_sql, params = filters.sql() if filters else ("TRUE", {})
+    params.update({"query_embedding": str(query_embedding), "fetch_k": fetch_k})
+    if backend == "hnsw":
+        params["query_ann"] = str(truncate_embedding(query_embedding))
+        params["candidate_k"] = fetch_k * settings.ann_oversampling
+    elif backend == "binary":
+        params["candidate_k"] = fetch_k * settings.binary_oversampling
+    if backend in ("hnsw", "binary"):
+        candidate_k = params["candidate_k"]
+        gucs = {"hnsw.ef_search": str(min(max(settings.ann_ef_search, candidate_k), _HNSW_MAX_EF_SEARCH))}
+        if (filters or candidate_k > _HNSW_MAX_EF_SEARCH) and settings.ann_iterative_scan != "off":
+            gucs["hnsw.iterative_scan"] = settings.ann_iterative_scan
+        await db.execute(
+            text("SELECT " + ", ".join(f"set_config('{name}', :guc_{i}, true)" for i, name in enumerate(gucs))),
+            {f"guc_{i}": value for i, value in enumerate(gucs.values())},
+        )
+    where = f"\n            WHERE {filter_sql}" if filters else ""
+    return _VECTOR_RANKING_SQL[backend].format(where=where), params
+
+
+async def _vector_search(
+    db: AsyncSession, query_embedding: list[float], fetch_k: int, filters: RetrievalFilters | None = None,
+) -> list[dict]:
+    """Semantic search: pgvector cosine distance, nearest first."""
+    with stage("vector_sql"):
+        ranking_sql, params = await _vector_ranking(db, query_embedding, fetch_k, filters)
+        result = await db.execute(
+            text(f"""
+                WITH vec AS ({ranking_sql}
+                )
+                SELECT{_CHUNK_COLUMNS},
+                    1 - vec.distance AS similarity
+                FROM vec
+                JOIN sermon_chunks sc ON sc.id = vec.id
+                ORDER BY vec.distance
+            """),
+            params,
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def _fts_search(
+    db: AsyncSession, query: str, fetch_k: int, filters: RetrievalFilters | None = None,
+) -> list[dict]:
+    """Keyword search: PostgreSQL full-text rank (BM25-like), best first.
+
+    Matches against the stored, GIN-indexed ``content_tsv`` column.
+    """
+    filter_sql, filter_params = filters.sql() if filters else ("TRUE", {})
+    with stage("fts_sql"):
+        result = await db.execute(
+            text(f"""
+                SELECT{_CHUNK_COLUMNS},
+                    ts_rank_cd(sc.content_tsv, q.tsq) AS fts_rank
+                FROM sermon_chunks sc, plainto_tsquery('simple', :query) AS q(tsq)
+                WHERE sc.content_tsv @@ q.tsq AND {filter_sql}
+                ORDER BY fts_rank DESC
+                LIMIT :fetch_k
+            """),
+            {**filter_params, "query": query, "fetch_k": fetch_k},
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+
+def _rrf_fuse(
+    vec_rows: list[dict],
+    fts_rows: list[dict],
+    top_k: int,
+    rrf_k: int,
+) -> list[tuple[dict, float]]:
+    """Reciprocal Rank Fusion of the two ranked lists → [(row, fused score)]."""
     scores: dict[int, float] = {}
     row_data: dict[int, dict] = {}
 
-    for rank, row in enumerate(vec_rows):
-        chunk_id = row["id"]
-        scores[chunk_id] = scores.get(chunk_id, 0) + 1.0 / (rrf_k + rank + 1)
-        row_data[chunk_id] = dict(row)
-
-    for rank, row in enumerate(fts_rows):
-        chunk_id = row["id"]
-        scores[chunk_id] = scores.get(chunk_id, 0) + 1.0 / (rrf_k + rank + 1)
-        if chunk_id not in row_data:
-            row_data[chunk_id] = dict(row)
+    for rows in (vec_rows, fts_rows):
+        for rank, row in enumerate(rows):
+            chunk_id = row["id"]
+            scores[chunk_id] = scores.get(chunk_id, 0) + 1.0 / (rrf_k + rank + 1)
+            row_data.setdefault(chunk_id, row)
 
     # Sort by fused score, take top_k
     top_ids = sorted(scores, key=lambda cid: scores[cid], reverse=True)[:top_k]
+    return [(row_data[cid], scores[cid]) for cid in top_ids]
 
-    # Enrich with source metadata
-    chunks = []
-    source_cache = {}
 
-    for chunk_id in top_ids:
-        row = row_data[chunk_id]
-        source_id = row["source_id"]
-        if source_id not in source_cache:
-            source_result = await db.execute(
-                select(SermonSource).where(SermonSource.id == source_id)
-            )
-            source = source_result.scalar_one_or_none()
-            if source:
-                source_cache[source_id] = {
-                    "title": source.title,
-                    "speaker": source.speaker,
-                    "sermon_date": source.sermon_date.isoformat() if source.sermon_date else None,
-                    "sermon_number": source.sermon_number,
-                    "source_type": source.source_type.value if source.source_type else None,
-                    "source_url": source.source_url,
-                    "scripture_ref": source.scripture_ref,
-                }
-
-        source_meta = source_cache.get(source_id, {})
+async def _timed_embed(query: str) -> list[float]:
+    with stage("embed_query"):
+        return await embed_query(query)
+
+
+async def _in_own_session(search, *args) -> list[dict]:
+    """Run a search on its own pooled connection so it can overlap with others."""
+    async with async_session() as session:
+        return await search(session, *args)
+
+
+async def _hybrid_sequential(
+    db: AsyncSession, query: str, top_k: int, filters: RetrievalFilters | None = None,
+) -> list[tuple[dict, float]]:
+    """Vector then FTS on the request's session; fused in Python."""
+    query_embedding = await _timed_embed(query)
+    vec_rows = await _vector_search(db, query_embedding, top_k * 2, filters)
+    fts_rows = await _fts_search(db, query, top_k * 2, filters)
+    return _rrf_fuse(vec_rows, fts_rows, top_k, settings.rrf_k)
+
+
+async def _hybrid_parallel(
+    db: AsyncSession, query: str, top_k: int, filters: RetrievalFilters | None = None,
+) -> list[tuple[dict, float]]:
+    """Vector and FTS concurrently on separate pooled connections.
+
+    The FTS query also overlaps with embedding the query, which it doesn't need.
+    """
+    async def embed_then_search() -> list[dict]:
+        query_embedding = await _timed_embed(query)
+        return await _in_own_session(_vector_search, query_embedding, top_k * 2, filters)
+
+    vec_rows, fts_rows = await asyncio.gather(
+        embed_then_search(),
+        _in_own_session(_fts_search, query, top_k * 2, filters),
+    )
+    return _rrf_fuse(vec_rows, fts_rows, top_k, settings.rrf_k)
+
+
+async def _hybrid_fused_sql(
+    db: AsyncSession, query: str, top_k: int, filters: RetrievalFilters | None = None,
+) -> list[tuple[dict, float]]:
+    """Both rankings and the RRF computed inside Postgres in one round trip."""
+    query_embedding = await _timed_embed(query)
+    filter_sql = filters.sql()[0] if filters else "TRUE"
+    with stage("fused_sql"):
+        ranking_sql, params = await _vector_ranking(db, query_embedding, top_k * 2, filters)
+        result = await db.execute(
+            text(f"""
+                WITH vec_ranked AS ({ranking_sql}
+                ),
+                vec AS (
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                    FROM vec_ranked
+                ),
+                fts AS (
+                    SELECT sc.id,
+                        ROW_NUMBER() OVER (ORDER BY ts_rank_cd(sc.content_tsv, q.tsq) DESC) AS rank
+                    FROM sermon_chunks sc, plainto_tsquery('simple', :query) AS q(tsq)
+                    WHERE sc.content_tsv @@ q.tsq AND {filter_sql}
+                    ORDER BY rank
+                    LIMIT :fetch_k
+                ),
+                fused AS (
+                    SELECT id, SUM(1.0 / (:rrf_k + rank)) AS rrf_score
+                    FROM (SELECT id, rank FROM vec UNION ALL SELECT id, rank FROM fts) AS ranked
+                    GROUP BY id
+                    ORDER BY rrf_score DESC
+                    LIMIT :top_k
+                )
+                SELECT{_CHUNK_COLUMNS},
+                    f.rrf_score
+                FROM fused f
+                JOIN sermon_chunks sc ON sc.id = f.id
+                ORDER BY f.rrf_score DESC
+            """),
+            {**params, "query": query, "rrf_k": settings.rrf_k, "top_k": top_k},
+        )
+        return [(dict(row), float(row["rrf_score"])) for row in result.mappings().all()]
+
+
+_RETRIEVAL_MODES = {
+    "sequential": _hybrid_sequential,
+    "parallel": _hybrid_parallel,
+    "fused_sql": _hybrid_fused_sql,
+}
+
+
+async def retrieve_relevant_chunks(
+    db: AsyncSession,
+    query: str,
+    top_k: int | None = None,
+    filters: RetrievalFilters | None = None,
+) -> list[dict]:
+    """Retrieve relevant sermon chunks using hybrid search (vector + full-text).
 
+    Combines pgvector cosine similarity with PostgreSQL full-text search
+    using Reciprocal Rank Fusion (RRF) for score merging. How the two searches
+    are executed is chosen by ``settings.retrieval_mode``:
+      - sequential: one after the other on the request's session
+      - parallel: concurrently on separate pooled connections
+      - fused_sql: a single CTE statement that fuses inside Postgres
+
+    The semantic side uses ``settings.vector_backend`` (see _VECTOR_RANKING_SQL).
+    ``filters`` restricts both searches to matching sermons before ranking.
+    """
+    top_k = top_k or settings.retrieval_top_k
+
+    if filters and filters.speaker:
+        speakers = await match_speakers(db, filters.speaker)
+        if not speakers:
+            return []
+        filters = replace(filters, speaker=None, speakers=speakers)
+
+    mode = settings.retrieval_mode
+    if mode not in _RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode}")
+    fused = await _RETRIEVAL_MODES[mode](db, query, top_k, filters)
+
+    # Enrich with source metadata (in-process cache, no per-source queries)
+    with stage("enrich"):
+        source_meta = await get_source_metadata(db, [row["source_id"] for row, _ in fused])
+
+    chunks = []
+    for row, score in fused:
+        source_id = row["source_id"]
         chunks.append({
             "id": row["id"],
             "source_id": source_id,
             "content": row["content"],
-            "similarity": round(scores[chunk_id], 6),  # RRF fused score
+            "similarity": round(score, 6),  # RRF fused score
+            "chunk_index": row["chunk_index"],
             "page_number": row["page_number"],
             "timestamp_start": row["timestamp_start"],
-            **source_meta,
+            **source_meta.get(source_id, {}),
         })
 
     return chunks
 
 
-def _build_context(chunks: list[dict], max_chunks: int | None = None) -> str:
-    """Build context string from retrieved chunks for the LLM prompt."""
-    max_chunks = max_chunks or settings.rerank_top_n
-    top_chunks = chunks[:max_chunks]
+def _fuse_chunk_lists(chunk_lists: list[list[dict]], top_k: int) -> list[dict]:
+    """RRF-merge already-retrieved chunk lists, e.g. raw-question and rewritten-query results."""
+    scores: dict[int, float] = {}
+    by_id: dict[int, dict] = {}
+    for chunks in chunk_lists:
+        for rank, chunk in enumerate(chunks):
+            scores[chunk["id"]] = scores.get(chunk["id"], 0) + 1.0 / (settings.rrf_k + rank + 1)
+            by_id.setdefault(chunk["id"], chunk)
 
-    context_parts = []
-    for i, chunk in enumerate(top_chunks, 1):
-        header = f"[Source {i}]"
-        if chunk.get("sermon_number"):
-            header += f" {chunk['sermon_number']}"
-        if chunk.get("title"):
-            header += f" - {chunk['title']}"
-        if chunk.get("speaker"):
-            header += f" ({chunk['speaker']})"
-        if chunk.get("sermon_date"):
-            header += f" [{chunk['sermon_date'][:10]}]"
-        if chunk.get("scripture_ref"):
-            header += f" | {chunk['scripture_ref']}"
+    top_ids = sorted(scores, key=lambda cid: scores[cid], reverse=True)[:top_k]
+    return [{**by_id[cid], "similarity": round(scores[cid], 6)} for cid in top_ids]
 
-        context_parts.append(f"{header}\n{chunk['content']}")
 
-    return "\n\n---\n\n".join(context_parts)
+def _answer_cache_applies(
+    chat_history: list[dict] | None, use_cache: bool, filters: RetrievalFilters | None = None,
+) -> bool:
+    """Only self-contained, unfiltered questions are cached — follow-ups depend
+    on history, filtered answers on the filter."""
+    return settings.answer_cache_enabled and use_cache and not chat_history and not filters
 
 
-async def query_sermons(
-    db: AsyncSession,
-    question: str,
-    language: str | None = None,
-    chat_history: list[dict] | None = None,
-) -> dict:
-    """Full RAG pipeline: retrieve → build context → generate answer."""
-    # Rewrite vague or follow-up questions for better retrieval
-    search_query = rewrite_query(question, chat_history) if chat_history else question
-
-    # Retrieve relevant chunks using the (possibly rewritten) search query
-    chunks = await retrieve_relevant_chunks(db, search_query)
-    chunk_count = len(chunks)
-
-    if not chunks:
-        return {
-            "answer": "Maaf, saya tidak menemukan konten khotbah yang relevan untuk menjawab pertanyaan Anda. Silakan coba rumuskan ulang atau tanyakan topik yang berbeda.",
-            "citations": [],
-            "language": "id",
-            "generation_time_ms": 0,
-            "context_chunk_count": 0,
-        }
+def _replay_pieces(answer: str, size: int = 4) -> list[str]:
+    """Split a cached answer into small word groups to replay as SSE tokens."""
+    words = answer.split(" ")
+    return [
+        " ".join(words[i : i + size]) + (" " if i + size < len(words) else "")
+        for i in range(0, len(words), size)
+    ]
+
+
+def _finish_timings(timings: dict[str, int], started: float) -> dict[str, int]:
+    """Record the request total and return a snapshot of the stage breakdown (ms)."""
+    record_stage("total", time.perf_counter() - started)
+    return dict(timings)
 
-    # Re-rank for true relevance (uses original question, not rewritten)
-    chunks = rerank_chunks(question, chunks)
 
-    # Build context from re-ranked chunks
-    context = _build_context(chunks)
+async def _cached_answer(question: str) -> tuple[list[float], dict | None]:
+    """Embed the question and look it up in the semantic answer cache."""
+    embedding = await _timed_embed(question)
+    with stage("answer_cache"):
+        return embedding, await lookup_answer(embedding)
 
-    # Generate answer via configured LLM provider
-    system_message = SYSTEM_PROMPT.format(context=context)
 
-    # Build messages: system → conversation history → current question
-    messages = [{"role": "system", "content": system_message}]
+def _build_messages(question: str, context_text: str, chat_history: list[dict] | None) -> list[dict]:
+    """system → conversation history → context + current question.
+
+    The system message and the last history turn are marked as cache
+    breakpoints: everything up to them is identical on the next turn of the
+    same conversation (and the system message across all conversations).
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT, "cache": True}]
     if chat_history:
-        messages.extend(chat_history)
-    messages.append({"role": "user", "content": question})
-
-    start_time = time.time()
-    answer = chat_completion(messages)
-    generation_time_ms = int((time.time() - start_time) * 1000)
-
-    # Build citations from the top chunks used
-    citations = []
-    seen_sources = set()
-    for chunk in chunks[: settings.rerank_top_n]:
-        source_id = chunk["source_id"]
-        if source_id in seen_sources:
-            continue
-        seen_sources.add(source_id)
-
-        page_or_ts = None
-        if chunk.get("page_number"):
-            page_or_ts = f"Page {chunk['page_number']}"
-        elif chunk.get("timestamp_start"):
-            page_or_ts = chunk["timestamp_start"]
-
-        citations.append({
-            "source_id": source_id,
-            "title": chunk.get("title", ""),
-            "speaker": chunk.get("speaker"),
-            "sermon_date": chunk.get("sermon_date"),
-            "sermon_number": chunk.get("sermon_number"),
-            "source_type": chunk.get("source_type", ""),
-            "relevance_score": round(chunk["similarity"], 4),
-            "excerpt": chunk["content"][:200] + "..." if len(chunk["content"]) > 200 else chunk["content"],
-            "page_or_timestamp": page_or_ts,
-        })
+        messages.extend({"role": m["role"], "content": m["content"]} for m in chat_history)
+        messages[-1]["cache"] = True
+    messages.append({"role": "user", "content": CONTEXT_TEMPLATE.format(context=context_text, question=question)})
+    return messages
+
+
+NO_RESULTS_ANSWER = "Maaf, saya tidak menemukan konten khotbah yang relevan untuk menjawab pertanyaan Anda. Silakan coba rumuskan ulang atau tanyakan topik yang berbeda."
+TIMEOUT_ANSWER = "Maaf, sistem sedang sibuk sehingga jawaban tidak dapat disusun tepat waktu. Silakan coba lagi sebentar lagi."
+
+
+class Deadline:
+    """Wall-clock budget for one request. ``seconds <= 0`` means unbounded."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds if seconds > 0 else None
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, cap: float, reserve: float = 0.0) -> float | None:
+        """Seconds a stage may take: at most ``cap``, leaving ``reserve`` for later stages."""
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        return max(0.0, min(cap, remaining - reserve))
+
+
+class RAGPipeline:
+    """One question through answer cache → rewrite → retrieve → rerank →
+    context → generate → citations, shared by query_sermons and
+    query_sermons_stream.
+
+    The request runs against a ``Deadline`` (``settings.request_deadline_seconds``)
+    that lasts until generation starts: the LLM call for the blocking path, the
+    first token when streaming. A started answer then runs to completion under
+    the provider's own timeout, so long answers are never cut off after their
+    tokens have been paid for. The optional stages get budgets capped so that
+    ``settings.deadline_generation_reserve_seconds`` stays free for generation.
+    When a stage runs out of budget, the pipeline degrades instead of failing:
+      - rewrite: search with the raw question (the speculative results if pipelined)
+      - rerank: keep the RRF order
+      - context: halve the token budget when little time is left before generation
+      - retrieval / generation: answer with TIMEOUT_ANSWER instead of hanging
+    Each degraded stage is listed in the result's ``degraded``, logged, and
+    counted in ``rag_degraded_total``. Degraded answers are not cached.
+
+    Under a deadline, retrieval runs on its own pooled connection. Callers
+    should end ``db``'s transaction first (commit) so the request doesn't hold
+    a second, idle connection while the pipeline runs.
+    """
 
-    return {
-        "answer": answer,
-        "citations": citations,
-        "language": language or "id",
-        "generation_time_ms": generation_time_ms,
-        "context_chunk_count": chunk_count,
-    }
+    def __init__(
+        self,
+        db: AsyncSession,
+        question: str,
+        language: str | None = None,
+        chat_history: list[dict] | None = None,
+        use_cache: bool = True,
+        filters: RetrievalFilters | None = None,
+        deadline_seconds: float | None = None,
+    ):
+        self.db = db
+        self.question = question
+        self.language = language or "id"
+        self.chat_history = chat_history
+        self.use_cache = use_cache
+        self.filters = filters or None
+        self.deadline = Deadline(settings.request_deadline_seconds if deadline_seconds is None else deadline_seconds)
+        self.timings = start_timings()
+        self.started = time.perf_counter()
+        self.degraded: list[str] = []
+        self.cache_embedding: list[float] | None = None
+        self.chunks: list[dict] = []
+        self.chunk_count = 0
+        self.context: BuiltContext | None = None
+        self.messages: list[dict] = []
+        self.fallback_answer: str | None = None
+        self.usage: dict = {}
+
+    def _degrade(self, stage_name: str, reason: str) -> None:
+        self.degraded.append(stage_name)
+        DEGRADED.labels(stage=stage_name).inc()
+        logger.warning("Degraded %s to meet the deadline (%s)", stage_name, reason)
+
+    # --- Stages ---
+
+    async def _search(self, query: str, own_session: bool = False) -> list[dict]:
+        """Hybrid retrieval for ``query``. Under a deadline it runs on its own
+        connection, so a cancelled search never leaves the request's session
+        mid-statement."""
+        budget = self.deadline.remaining()
+        if budget is None and not own_session:
+            return await retrieve_relevant_chunks(self.db, query, None, self.filters)
+        return await asyncio.wait_for(_in_own_session(retrieve_relevant_chunks, query, None, self.filters), budget)
+
+    async def _rewrite(self) -> str | None:
+        """The rewritten search query, or None if the rewrite ran out of budget."""
+        budget = self.deadline.budget(settings.deadline_rewrite_seconds, settings.deadline_generation_reserve_seconds)
+        if budget == 0:
+            self._degrade("rewrite", "no budget left")
+            return None
+        try:
+            with stage("rewrite"):
+                return await asyncio.wait_for(rewrite_query(self.question, self.chat_history), budget)
+        except asyncio.TimeoutError:
+            self._degrade("rewrite", f"over {budget:.1f}s")
+            return None
+
+    async def _retrieve(self) -> list[dict]:
+        """Rewrite the question if needed, then retrieve chunks for it.
+
+        With ``settings.rewrite_mode == "pipelined"`` the rewrite is taken off the
+        critical path: self-contained questions skip it entirely, and otherwise
+        retrieval on the raw question runs speculatively while the rewrite is in
+        flight. Its result is fused with (or replaced by) the rewritten query's
+        retrieval according to ``settings.rewrite_merge``.
+        """
+        question = self.question
+        if not self.chat_history:
+            return await self._search(question)
+
+        if settings.rewrite_mode != "pipelined":
+            return await self._search(await self._rewrite() or question)
+
+        if not needs_rewrite(question):
+            logger.info("Skipping rewrite for self-contained question: '%s'", question)
+            return await self._search(question)
+
+        speculative = asyncio.create_task(self._search(question, own_session=True))
+        try:
+            search_query = await self._rewrite()
+            if search_query is None or search_query.strip().lower() == question.strip().lower():
+                return await speculative
+
+            if settings.rewrite_merge == "replace":
+                speculative.cancel()
+                return await self._search(search_query)
+
+            rewritten_chunks = await self._search(search_query)
+            return _fuse_chunk_lists(
+                [rewritten_chunks, await speculative], settings.retrieval_top_k,
+            )
+        finally:
+            if not speculative.done():
+                speculative.cancel()
+
+    async def _rerank(self, chunks: list[dict]) -> list[dict]:
+        """Re-rank for true relevance (uses the original question, not the rewrite)."""
+        budget = self.deadline.budget(settings.deadline_rerank_seconds, settings.deadline_generation_reserve_seconds)
+        if budget == 0:
+            self._degrade("rerank", "no budget left")
+            return chunks[: settings.rerank_top_n]
+        try:
+            with stage("rerank"):
+                return await asyncio.wait_for(rerank_chunks(self.question, chunks), budget)
+        except asyncio.TimeoutError:
+            self._degrade("rerank", f"over {budget:.1f}s")
+            return chunks[: settings.rerank_top_n]
+
+    def _build_context(self, chunks: list[dict]) -> BuiltContext:
+        """Merged, deduplicated, token-budgeted context; smaller when time is short."""
+        token_budget = None
+        remaining = self.deadline.remaining()
+        if remaining is not None and remaining < settings.deadline_shrink_context_below_seconds:
+            token_budget = settings.context_token_budget // 2
+            self._degrade("context", f"{remaining:.1f}s left")
+        with stage("context"):
+            return build_context(chunks, token_budget=token_budget)
+
+    async def prepare(self) -> dict | None:
+        """Run every stage before generation. Returns the cached result on an
+        answer-cache hit; otherwise leaves either ``messages`` ready for the LLM
+        or a ``fallback_answer``."""
+        if _answer_cache_applies(self.chat_history, self.use_cache, self.filters):
+            self.cache_embedding, cached = await _cached_answer(self.question)
+            if cached:
+                return cached
+
+        try:
+            chunks = await self._retrieve()
+        except asyncio.TimeoutError:
+            self._degrade("retrieval", "deadline exceeded")
+            self.fallback_answer = TIMEOUT_ANSWER
+            return None
+
+        self.chunk_count = len(chunks)
+        if not chunks:
+            self.fallback_answer = NO_RESULTS_ANSWER
+            return None
+
+        self.chunks = await self._rerank(chunks)
+        self.context = self._build_context(self.chunks)
+        self.messages = _build_messages(self.question, self.context.text, self.chat_history)
+        return None
+
+    # --- Results ---
+
+    def _citations(self) -> list[dict]:
+        """One citation per source among the top chunks that made it into the context."""
+        if self.context is None:
+            return []
+        citations = []
+        seen_sources = set()
+        context_ids = {c["id"] for span in self.context.spans for c in span.chunks}
+        for chunk in self.chunks[: settings.rerank_top_n]:
+            source_id = chunk["source_id"]
+            if source_id in seen_sources or chunk["id"] not in context_ids:
+                continue
+            seen_sources.add(source_id)
+
+            page_or_ts = None
+            if chunk.get("page_number"):
+                page_or_ts = f"Page {chunk['page_number']}"
+            elif chunk.get("timestamp_start"):
+                page_or_ts = chunk["timestamp_start"]
+
+            citations.append({
+                "source_id": source_id,
+                "title": chunk.get("title", ""),
+                "speaker": chunk.get("speaker"),
+                "sermon_date": chunk.get("sermon_date"),
+                "sermon_number": chunk.get("sermon_number"),
+                "source_type": chunk.get("source_type", ""),
+                "relevance_score": round(chunk["similarity"], 4),
+                "excerpt": chunk["content"][:200] + "..." if len(chunk["content"]) > 200 else chunk["content"],
+                "page_or_timestamp": page_or_ts,
+            })
+        return citations
+
+    def _result(self, answer: str, generation_time_ms: int = 0) -> dict:
+        result = {
+            "answer": answer,
+            "citations": self._citations() if answer != TIMEOUT_ANSWER else [],
+            "language": self.language,
+            "generation_time_ms": generation_time_ms,
+            "context_chunk_count": self.chunk_count,
+        }
+        if self.context is not None:
+            result["context_tokens"] = self.context.tokens
+            result["context_tokens_saved"] = self.context.tokens_saved
+            result["usage"] = self.usage
+        if self.degraded:
+            result["degraded"] = self.degraded
+        result["timings"] = _finish_timings(self.timings, self.started)
+        return result
+
+    def _store(self, result: dict) -> None:
+        """Cache full-quality answers only, in the background so the response isn't held up."""
+        if self.cache_embedding is not None and self.context is not None and not self.degraded and result["answer"]:
+            run_in_background(store_answer(self.question, self.cache_embedding, result))
+
+    @staticmethod
+    def _closing_events(result: dict) -> list[dict]:
+        telemetry = {k: v for k, v in result.items() if k not in ("answer", "citations", "language")}
+        return [
+            {"type": "citations", "data": result["citations"]},
+            {"type": "telemetry", "data": telemetry},
+            {"type": "done"},
+        ]
+
+    # --- Entry points ---
+
+    async def run(self) -> dict:
+        cached = await self.prepare()
+        if cached:
+            return {**cached, "timings": _finish_timings(self.timings, self.started)}
+        if self.fallback_answer:
+            return self._result(self.fallback_answer)
+
+        # The deadline only decides whether generation starts; once sent, the
+        # call runs to completion under the provider's own timeout.
+        if self.deadline.remaining() == 0:
+            self._degrade("generation", "deadline exceeded before generation")
+            return self._result(TIMEOUT_ANSWER)
+        start_time = time.time()
+        with stage("generation"):
+            answer = await achat_completion(self.messages, usage=self.usage)
+        result = self._result(answer, int((time.time() - start_time) * 1000))
+        self._store(result)
+        return result
+
+    async def stream(self):
+        cached = await self.prepare()
+        if cached:
+            for piece in _replay_pieces(cached["answer"]):
+                yield {"type": "token", "content": piece}
+            yield {"type": "citations", "data": cached["citations"]}
+            yield {"type": "telemetry", "data": {
+                "generation_time_ms": 0,
+                "context_chunk_count": cached["context_chunk_count"],
+                "cached": True,
+                "timings": _finish_timings(self.timings, self.started),
+            }}
+            yield {"type": "done"}
+            return
+
+        if self.fallback_answer:
+            yield {"type": "token", "content": self.fallback_answer}
+            for event in self._closing_events(self._result(self.fallback_answer)):
+                yield event
+            return
+
+        # Only the first token is held to the deadline; once the answer is
+        # flowing it streams to completion under the provider's own timeout.
+        start_time = time.time()
+        tokens = achat_completion_stream(self.messages, usage=self.usage)
+        try:
+            answer = await asyncio.wait_for(anext(tokens, ""), self.deadline.remaining())
+        except asyncio.TimeoutError:
+            await tokens.aclose()
+            self._degrade("generation", "no first token before the deadline")
+            answer, tokens = TIMEOUT_ANSWER, None
+        else:
+            record_stage("first_token", time.time() - start_time)
+
+        if answer:
+            yield {"type": "token", "content": answer}
+        if tokens is not None:
+            async for token in tokens:
+                answer += token
+                yield {"type": "token", "content": token}
+        generation_time_ms = int((time.time() - start_time) * 1000)
+        record_stage("generation", generation_time_ms / 1000)
+
+        result = self._result(answer, generation_time_ms)
+        for event in self._closing_events(result):
+            yield event
+        self._store(result)
 
 
-async def query_sermons_stream(
+async def query_sermons(
     db: AsyncSession,
     question: str,
     language: str | None = None,
     chat_history: list[dict] | None = None,
-):
-    """Streaming version of query_sermons. Yields answer tokens as they arrive."""
-    # Rewrite vague or follow-up questions for better retrieval
-    search_query = rewrite_query(question, chat_history) if chat_history else question
-
-    # Retrieve relevant chunks using the (possibly rewritten) search query
-    chunks = await retrieve_relevant_chunks(db, search_query)
-    chunk_count = len(chunks)
-
-    if not chunks:
-        no_answer = "Maaf, saya tidak menemukan konten khotbah yang relevan untuk menjawab pertanyaan Anda."
-        yield {"type": "token", "content": no_answer}
-        yield {"type": "citations", "data": []}
-        yield {"type": "telemetry", "data": {"generation_time_ms": 0, "context_chunk_count": 0}}
-        yield {"type": "done"}
-        return
-
-    # Re-rank for true relevance
-    chunks = rerank_chunks(question, chunks)
+    use_cache: bool = True,
+    filters: RetrievalFilters | None = None,
+) -> dict:
+    """Full RAG pipeline: retrieve → build context → generate answer.
 
-    context = _build_context(chunks)
+    Self-contained questions (no chat history) are first looked up in the
+    semantic answer cache unless ``use_cache`` is False. Every result carries
+    a per-stage latency breakdown in ``timings`` (ms), and ``degraded`` lists
+    any stage cut short by the request deadline (see RAGPipeline). ``filters``
+    restricts retrieval to matching sermons.
+    """
+    return await RAGPipeline(db, question, language, chat_history, use_cache, filters).run()
 
-    system_message = SYSTEM_PROMPT.format(context=context)
 
-    # Build messages: system → conversation history → current question
-    messages = [{"role": "system", "content": system_message}]
-    if chat_history:
-        messages.extend(chat_history)
-    messages.append({"role": "user", "content": question})
-
-    start_time = time.time()
-    for token in chat_completion_stream(messages):
-        yield {"type": "token", "content": token}
-    generation_time_ms = int((time.time() - start_time) * 1000)
-
-    # Send citations after full answer
-    citations = []
-    seen_sources = set()
-    for chunk in chunks[: settings.rerank_top_n]:
-        source_id = chunk["source_id"]
-        if source_id in seen_sources:
-            continue
-        seen_sources.add(source_id)
-
-        page_or_ts = None
-        if chunk.get("page_number"):
-            page_or_ts = f"Page {chunk['page_number']}"
-        elif chunk.get("timestamp_start"):
-            page_or_ts = chunk["timestamp_start"]
-
-        citations.append({
-            "source_id": source_id,
-            "title": chunk.get("title", ""),
-            "speaker": chunk.get("speaker"),
-            "sermon_date": chunk.get("sermon_date"),
-            "sermon_number": chunk.get("sermon_number"),
-            "source_type": chunk.get("source_type", ""),
-            "relevance_score": round(chunk["similarity"], 4),
-            "excerpt": chunk["content"][:200] + "...",
-            "page_or_timestamp": page_or_ts,
-        })
+async def query_sermons_stream(
+    db: AsyncSession,
+    question: str,
+    language: str | None = None,
+    chat_history: list[dict] | None = None,
+    use_cache: bool = True,
+    filters: RetrievalFilters | None = None,
+):
+    """Streaming version of query_sermons. Yields answer tokens as they arrive.
 
-    yield {"type": "citations", "data": citations}
-    yield {"type": "telemetry", "data": {"generation_time_ms": generation_time_ms, "context_chunk_count": chunk_count}}
-    yield {"type": "done"}
+    A semantic cache hit is replayed as the same sequence of events. The
+    telemetry event carries the per-stage latency breakdown in ``timings``.
+    """
+    async for event in RAGPipeline(db, question, language, chat_history, use_cache, filters).stream():
+        yield event
@@ -1,13 +1,21 @@
 """Query rewriter — uses a fast LLM to reformulate vague or follow-up
 questions into self-contained, search-optimised queries."""
 
+import hashlib
+import json
 import logging
-from app.services.llm_provider import chat_completion
+import re
+from app.services.cache import TTLCache
+from app.services.llm_provider import achat_completion
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Keyed on the history window + question, so entries go stale on their own
+# as soon as the conversation advances
+_rewrite_cache = TTLCache(settings.rewrite_cache_size, settings.rewrite_cache_ttl_seconds)
+
 
 REWRITE_PROMPT = """You are a query rewriter for a sermon search engine.
 Your job is to rewrite the user's question into a clear, self-contained search query 
@@ -22,7 +30,41 @@ RULES:
 6. Return ONLY the rewritten query, nothing else."""
 
 
-def rewrite_query(
+# Words that usually point back into the conversation (Indonesian + English)
+_ANAPHORA = frozenset("""
+    itu ini tersebut tadi dia ia beliau mereka nya lagi juga lanjut lanjutkan
+    sebelumnya barusan kenapa mengapa contohnya maksudnya artinya
+    it that this these those they them he him she her his its more also else
+    previous above earlier why example
+""".split())
+
+_MIN_SELF_CONTAINED_WORDS = 4
+
+
+def needs_rewrite(question: str) -> bool:
+    """Cheap heuristic: does this question likely depend on the conversation?
+
+    Short questions and ones containing back-references ("itu", "tersebut",
+    "-nya", "it", "that", ...) are rewritten; anything else is treated as
+    self-contained. Errs on the side of rewriting.
+    """
+    words = re.findall(r"\w+", question.lower())
+    if len(words) < _MIN_SELF_CONTAINED_WORDS:
+        return True
+    return any(w in _ANAPHORA or (w.endswith("nya") and len(w) > 5) for w in words)
+
+
+def _rewrite_cache_key(question: str, chat_history: list[dict]) -> str:
+    window = [[msg["role"], msg["content"].strip()] for msg in chat_history]
+    raw = json.dumps([window, " ".join(question.split())], ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def rewrite_cache_stats() -> dict:
+    return _rewrite_cache.stats()
+
+
+async def rewrite_query(
     question: str,
     chat_history: list[dict] | None = None,
 ) -> str:
@@ -35,20 +77,33 @@ def rewrite_query(
     if not chat_history:
         return question
 
+    cache_key = _rewrite_cache_key(question, chat_history)
+    cached = _rewrite_cache.get(cache_key)
+    if cached is not None:
+        logger.info(
+            "Query rewritten (cached, hit rate %.0f%%): '%s' → '%s'",
+            100 * _rewrite_cache.stats()["hit_rate"], question, cached,
+        )
+        return cached
+
     messages = [{"role": "system", "content": REWRITE_PROMPT}]
     messages.extend(chat_history)
     messages.append({"role": "user", "content": f"Rewrite this search query: {question}"})
 
     try:
-        rewritten = chat_completion(
+        rewritten = (await achat_completion(
             messages,
             temperature=0,
             max_tokens=200,
             use_mini=True,
-        ).strip()
+        )).strip()
         
         if rewritten:
-            logger.info("Query rewritten: '%s' → '%s'", question, rewritten)
+            _rewrite_cache.set(cache_key, rewritten)
+            logger.info(
+                "Query rewritten (hit rate %.0f%%): '%s' → '%s'",
+                100 * _rewrite_cache.stats()["hit_rate"], question, rewritten,
+            )
             return rewritten
     except Exception as e:
         logger.warning("Query rewrite failed, using original: %s", e)
@@ -1,16 +1,35 @@
 """Re-ranker — scores (query, chunk) pairs for true relevance after initial retrieval.
 
-Uses the provider's mini model as a cross-encoder-style re-ranker.
+By default uses the provider's mini model as a cross-encoder-style re-ranker.
 Cheaper than the main model but far more accurate than embedding distance alone.
+
+Backends are pluggable (see RERANK_BACKENDS) and chosen by ``settings.rerank_backend``:
+  - llm: the provider's mini model (network, most accurate)
+  - lexical: BM25 over the candidate set plus title / scripture-reference
+    features, computed in-process on CPU in a few milliseconds
+
+The LLM backend has two modes, selected by ``settings.rerank_mode``:
+  - pointwise: one scoring call per chunk, fanned out concurrently, bounded
+    both per request and across the whole process, each with its own timeout
+  - listwise: all candidates in a single prompt, answered with a ranked list
+    or a score per passage; falls back to pointwise if the reply can't be parsed
 """
 
+import asyncio
+import json
 import logging
-from app.services.llm_provider import chat_completion
+import math
+import re
+from typing import Awaitable, Callable
+from app.services.llm_provider import achat_completion
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Process-wide cap on in-flight rerank calls, shared by all requests
+_global_semaphore = asyncio.Semaphore(settings.rerank_global_concurrency)
+
 
 RERANK_PROMPT = """Score how relevant the following text passage is to the search query.
 Return ONLY a number from 0 to 10, where:
@@ -25,52 +44,299 @@ Passage: {passage}
 Score:"""
 
 
-def rerank_chunks(
+LISTWISE_RERANK_PROMPT = """Rank the following text passages by how relevant they are to the search query.
+Each passage is labelled with an id in square brackets.
+
+Return ONLY a JSON object mapping every passage id to a score from 0 to 10, where:
+- 0 = completely irrelevant
+- 5 = somewhat relevant, tangentially related
+- 10 = directly and precisely answers the query
+
+Example: {{"1": 7, "2": 0, "3": 10}}
+
+Query: {query}
+
+Passages:
+{passages}
+
+Scores:"""
+
+
+def _parse_listwise_scores(text: str, count: int) -> dict[int, float] | None:
+    """Parse a listwise reply into {passage_index: score}.
+
+    Accepts a JSON object of id → score, a JSON list of ids in ranked order,
+    or a bare comma/space separated list of ids. Returns None if nothing usable,
+    so the caller falls back to pointwise scoring.
+    """
+    text = re.sub(r"^```(?:json)?|```$", "", text.strip()).strip()
+
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        if "{" in text or ":" in text:
+            # Object-shaped reply with surrounding prose or a trailing comma: its
+            # numbers are scores, not ids, so never read them as a ranking
+            match = re.search(r"\{.*\}", text, re.DOTALL)
+            try:
+                parsed = json.loads(re.sub(r",\s*}", "}", match.group(0))) if match else None
+            except ValueError:
+                parsed = None
+        else:
+            parsed = [int(tok) for tok in re.findall(r"\d+", text)]
+
+    scores: dict[int, float] = {}
+    if isinstance(parsed, dict):
+        for key, value in parsed.items():
+            try:
+                idx, score = int(key) - 1, float(value)
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < count:
+                scores[idx] = score
+    elif isinstance(parsed, list):
+        ranked = []
+        for item in parsed:
+            try:
+                idx = int(item) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < count and idx not in ranked:
+                ranked.append(idx)
+        # Map rank position onto the same 0-10 scale as the pointwise scores;
+        # passages left out of the ranking go to the bottom
+        if ranked:
+            scores = {idx: 0.0 for idx in range(count)}
+        for pos, idx in enumerate(ranked):
+            scores[idx] = 10.0 * (1 - pos / count)
+
+    return scores or None
+
+
+async def _score_chunk(
+    query: str,
+    chunk: dict,
+    request_semaphore: asyncio.Semaphore,
+) -> float | None:
+    """Score a single chunk. Returns None if the call failed or timed out."""
+    async with request_semaphore, _global_semaphore:
+        try:
+            score_text = await asyncio.wait_for(
+                achat_completion(
+                    messages=[{
+                        "role": "user",
+                        "content": RERANK_PROMPT.format(
+                            query=query,
+                            passage=chunk["content"][:500],
+                        ),
+                    }],
+                    temperature=0,
+                    max_tokens=5,
+                    use_mini=True,
+                ),
+                timeout=settings.rerank_timeout_seconds,
+            )
+            return float(score_text.strip())
+        except asyncio.TimeoutError:
+            logger.debug("Rerank timed out for chunk %s", chunk.get("id"))
+        except Exception as e:
+            logger.debug("Rerank score parse failed for chunk %s: %s", chunk.get("id"), e)
+    return None
+
+
+async def _pointwise_scores(query: str, chunks: list[dict]) -> list[float | None]:
+    """Score each chunk with its own mini-model call, bounded in parallel."""
+    request_semaphore = asyncio.Semaphore(settings.rerank_concurrency)
+    scores = await asyncio.gather(
+        *(_score_chunk(query, chunk, request_semaphore) for chunk in chunks)
+    )
+    return list(scores)
+
+
+async def _listwise_scores(query: str, chunks: list[dict]) -> list[float | None]:
+    """Score all chunks with one mini-model call.
+
+    Passages the model leaves out of its reply get None. Raises ValueError if
+    the reply can't be parsed at all.
+    """
+    passages = "\n\n".join(
+        f"[{i}] {chunk['content'][:500]}" for i, chunk in enumerate(chunks, 1)
+    )
+    async with _global_semaphore:
+        reply = await asyncio.wait_for(
+            achat_completion(
+                messages=[{
+                    "role": "user",
+                    "content": LISTWISE_RERANK_PROMPT.format(query=query, passages=passages),
+                }],
+                temperature=0,
+                max_tokens=10 * len(chunks) + 20,
+                use_mini=True,
+            ),
+            timeout=settings.rerank_listwise_timeout_seconds,
+        )
+
+    parsed = _parse_listwise_scores(reply, len(chunks))
+    if parsed is None:
+        raise ValueError(f"Unparseable listwise rerank reply: {reply[:100]!r}")
+    return [parsed.get(i) for i in range(len(chunks))]
+
+
+async def _llm_scores(query: str, chunks: list[dict]) -> list[float | None]:
+    """LLM backend: pointwise or listwise scoring by the provider's mini model."""
+    if settings.rerank_mode == "listwise":
+        try:
+            return await _listwise_scores(query, chunks)
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            logger.warning("Listwise rerank failed, falling back to pointwise: %s", e)
+    return await _pointwise_scores(query, chunks)
+
+
+# ─────────────────────────────────────────────
+# Lexical backend (in-process, no network)
+# ─────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Scripture references like "Roma 8:28", "1 Yohanes 4:8", "Mat. 5:3-12"
+_SCRIPTURE_RE = re.compile(r"\b((?:[1-3]\s*)?[A-Za-z]{2,})\.?\s+(\d{1,3})\s*:\s*\d{1,3}")
+
+# Function words that carry no topical signal (Indonesian + English)
+_STOPWORDS = frozenset("""
+    yang dan di ke dari itu ini apa apakah adalah untuk dengan dalam pada tidak
+    akan juga atau oleh sebagai bagaimana mengapa kita kami saya anda dia mereka
+    ada bisa karena jika kalau maka sudah telah lebih para the a an of to in and
+    is are was what why how does do for on with that this be it as by or
+""".split())
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _scripture_refs(text: str) -> set[tuple[str, str]]:
+    """Extract (book prefix, chapter) pairs; the 3-char prefix tolerates abbreviations."""
+    return {
+        (re.sub(r"\s+", "", book.lower())[:3], chapter)
+        for book, chapter in _SCRIPTURE_RE.findall(text)
+    }
+
+
+async def _lexical_scores(query: str, chunks: list[dict]) -> list[float | None]:
+    """Lexical backend: BM25 over the candidate set plus cheap relevance features.
+
+    Scores on the same 0-10 scale as the LLM backend:
+      - BM25 of the query against each passage, normalised to the best candidate (0-6)
+      - fraction of distinct query terms present in the passage (0-2)
+      - query terms found in the sermon title (0-1)
+      - scripture reference in the query matched by the passage or sermon (0-1)
+    """
+    query_terms = set(_tokenize(query))
+    if not query_terms:
+        return [None] * len(chunks)
+    query_refs = _scripture_refs(query)
+
+    docs = [_tokenize(chunk["content"]) for chunk in chunks]
+    avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+    doc_freq = {t: sum(1 for d in docs if t in d) for t in query_terms}
+
+    bm25 = []
+    for doc in docs:
+        score = 0.0
+        for term in query_terms:
+            tf = doc.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (_BM25_K1 + 1) / (
+                tf + _BM25_K1 * (1 - _BM25_B + _BM25_B * len(doc) / avg_len)
+            )
+        bm25.append(score)
+    best_bm25 = max(bm25) or 1.0
+
+    scores = []
+    for chunk, doc, doc_bm25 in zip(chunks, docs, bm25):
+        doc_terms = set(doc)
+        title_terms = set(_tokenize(chunk.get("title") or ""))
+
+        score = 6.0 * doc_bm25 / best_bm25
+        score += 2.0 * len(query_terms & doc_terms) / len(query_terms)
+        score += 1.0 * len(query_terms & title_terms) / len(query_terms)
+        if query_refs:
+            chunk_refs = _scripture_refs(f"{chunk['content']} {chunk.get('scripture_ref') or ''}")
+            score += 1.0 if query_refs & chunk_refs else 0.0
+        scores.append(score)
+
+    return scores
+
+
+# ─────────────────────────────────────────────
+# Unified Interface
+# ─────────────────────────────────────────────
+
+# A backend takes (query, chunks) and returns one 0-10 score per chunk, or None
+# where a score couldn't be produced. Raising asyncio.TimeoutError keeps RRF order.
+RerankBackend = Callable[[str, list[dict]], Awaitable[list[float | None]]]
+
+RERANK_BACKENDS: dict[str, RerankBackend] = {
+    "llm": _llm_scores,
+    "lexical": _lexical_scores,
+}
+
+
+async def rerank_chunks(
     query: str,
     chunks: list[dict],
     top_n: int | None = None,
+    backend: str | None = None,
 ) -> list[dict]:
-    """Re-rank retrieved chunks by true relevance using LLM scoring.
-    
-    Takes an over-retrieved set of chunks and returns the top_n most relevant.
-    Each chunk gets a relevance score from the provider's mini model.
+    """Re-rank retrieved chunks by true relevance.
+
+    Takes an over-retrieved set of chunks and returns the top_n most relevant,
+    scored by the backend named in ``settings.rerank_backend`` (or ``backend``).
+    Chunks whose score failed or timed out get a neutral score and keep their
+    RRF order relative to each other.
     """
     top_n = top_n or settings.rerank_top_n
-    
+    backend = backend or settings.rerank_backend
+
     if len(chunks) <= top_n:
         return chunks
 
-    scored_chunks = []
+    if backend not in RERANK_BACKENDS:
+        raise ValueError(f"Unknown rerank backend: {backend}")
 
-    for chunk in chunks:
-        try:
-            score_text = chat_completion(
-                messages=[{
-                    "role": "user",
-                    "content": RERANK_PROMPT.format(
-                        query=query,
-                        passage=chunk["content"][:500],
-                    ),
-                }],
-                temperature=0,
-                max_tokens=5,
-                use_mini=True,
-            ).strip()
-            score = float(score_text)
-        except (ValueError, Exception) as e:
-            logger.debug("Rerank score parse failed for chunk %s: %s", chunk.get("id"), e)
-            score = 5.0  # Default to middle score if parsing fails
+    try:
+        scores = await RERANK_BACKENDS[backend](query, chunks)
+    except asyncio.TimeoutError:
+        logger.warning("Rerank (%s) timed out, keeping RRF order", backend)
+        return chunks[:top_n]
 
-        scored_chunks.append({**chunk, "rerank_score": score})
+    failed = sum(1 for s in scores if s is None)
+    if failed == len(chunks):
+        logger.warning("All %d rerank scores failed, keeping RRF order", failed)
+        return chunks[:top_n]
 
-    # Sort by rerank score descending
+    scored_chunks = [
+        {**chunk, "rerank_score": score if score is not None else 5.0}  # Neutral default
+        for chunk, score in zip(chunks, scores)
+    ]
+
+    # Sort by rerank score descending (stable, so ties keep RRF order)
     scored_chunks.sort(key=lambda c: c["rerank_score"], reverse=True)
-    
+
     logger.info(
-        "Reranked %d chunks → top %d (scores: %s)",
+        "Reranked (%s) %d chunks → top %d (scores: %s, failed: %d)",
+        backend,
         len(scored_chunks),
         top_n,
         [round(c["rerank_score"], 1) for c in scored_chunks[:top_n]],
+        failed,
     )
 
     return scored_chunks[:top_n]
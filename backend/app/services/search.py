@@ -0,0 +1,155 @@
+"""Search-only retrieval: ranked passages for a query, with no LLM in the path.
+
+Runs the same hybrid retrieval as chat (vector + full-text, RRF fused) but
+never calls the rewriter, reranker or generator. The fused ranking for a
+(query, filters) pair is computed once, up to ``settings.search_max_results``,
+and cached in-process per corpus version. Later pages are slices of it. The cursor is an opaque
+token holding the offset and a fingerprint of the query and filters, so a
+cursor cannot be replayed against a different search.
+
+Snippets come from Postgres ``ts_headline`` for just the page's chunks. They
+are HTML-escaped, with query terms wrapped in ``<mark>``.
+"""
+
+import base64
+import binascii
+import hashlib
+import html
+import json
+import logging
+from dataclasses import asdict
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.services.cache import TTLCache
+from app.services.corpus import get_corpus_version
+from app.services.query_engine import RetrievalFilters, retrieve_relevant_chunks
+from app.services.timing import stage
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_results_cache = TTLCache(settings.search_cache_size, settings.search_cache_ttl_seconds)
+
+# ts_headline markers: control characters that survive html.escape untouched
+_START, _STOP = "\x02", "\x03"
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or belongs to a different query."""
+
+
+def _fingerprint(query: str, filters: RetrievalFilters | None) -> str:
+    key = json.dumps(
+        {"q": " ".join(query.lower().split()), "f": asdict(filters) if filters else None},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, fingerprint: str) -> str:
+    raw = json.dumps({"o": offset, "f": fingerprint}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(data["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if data.get("f") != fingerprint or offset < 0:
+        raise InvalidCursor("Cursor does not belong to this search")
+    return offset
+
+
+async def _ranked_chunks(
+    db: AsyncSession, query: str, filters: RetrievalFilters | None, fingerprint: str,
+) -> list[dict]:
+    key = (fingerprint, await get_corpus_version(db))  # New ingestions invalidate the cached rankings
+    ranked = _results_cache.get(key)
+    if ranked is None:
+        ranked = await retrieve_relevant_chunks(db, query, settings.search_max_results, filters)
+        _results_cache.set(key, ranked)
+    return ranked
+
+
+async def _highlights(db: AsyncSession, query: str, chunk_ids: list[int]) -> dict[int, str]:
+    """{chunk_id: escaped snippet with <mark>ed query terms} for one page."""
+    if not chunk_ids:
+        return {}
+    with stage("highlight"):
+        result = await db.execute(
+            text("""
+                SELECT sc.id, ts_headline('simple', sc.content, plainto_tsquery('simple', :query), :options) AS snippet
+                FROM sermon_chunks sc
+                WHERE sc.id = ANY(CAST(:ids AS integer[]))
+            """),
+            {
+                "query": query,
+                "ids": chunk_ids,
+                "options": (
+                    f"StartSel={_START}, StopSel={_STOP}, MaxWords={settings.search_snippet_words}, "
+                    f"MinWords={settings.search_snippet_words // 2}, MaxFragments=2, FragmentDelimiter=\" … \""
+                ),
+            },
+        )
+        return {
+            row.id: html.escape(row.snippet).replace(_START, "<mark>").replace(_STOP, "</mark>")
+            for row in result
+        }
+
+
+def _page_or_timestamp(chunk: dict) -> str | None:
+    if chunk.get("page_number"):
+        return f"Page {chunk['page_number']}"
+    return chunk.get("timestamp_start")
+
+
+async def search_passages(
+    db: AsyncSession,
+    query: str,
+    filters: RetrievalFilters | None = None,
+    limit: int = 10,
+    cursor: str | None = None,
+) -> dict:
+    """One page of fused passages for ``query``, best first.
+
+    Returns {"results": [...], "next_cursor": str | None, "total": int}; raises
+    InvalidCursor for a cursor from another search.
+    """
+    fingerprint = _fingerprint(query, filters)
+    offset = decode_cursor(cursor, fingerprint) if cursor else 0
+
+    ranked = await _ranked_chunks(db, query, filters, fingerprint)
+    page = ranked[offset : offset + limit]
+    snippets = await _highlights(db, query, [c["id"] for c in page])
+
+    results = [
+        {
+            "chunk_id": chunk["id"],
+            "source_id": chunk["source_id"],
+            "title": chunk.get("title", ""),
+            "speaker": chunk.get("speaker"),
+            "sermon_date": chunk.get("sermon_date"),
+            "sermon_number": chunk.get("sermon_number"),
+            "source_type": chunk.get("source_type", ""),
+            "source_url": chunk.get("source_url"),
+            "score": chunk["similarity"],
+            "rank": offset + i + 1,
+            "snippet": snippets.get(chunk["id"]) or html.escape(chunk["content"][:300]),
+            "page_or_timestamp": _page_or_timestamp(chunk),
+        }
+        for i, chunk in enumerate(page)
+    ]
+    next_offset = offset + limit
+    return {
+        "results": results,
+        "next_cursor": encode_cursor(next_offset, fingerprint) if next_offset < len(ranked) else None,
+        "total": len(ranked),
+    }
+
+
+def search_cache_stats() -> dict:
+    return _results_cache.stats()
@@ -0,0 +1,57 @@
+"""Per-stage latency timings for the RAG pipeline.
+
+``start_timings()`` opens a timings dict for the current request. It is held
+in a ContextVar, so tasks spawned by the request (parallel searches, the
+speculative retrieval) write into the same dict. ``with stage("vector_sql"):``
+adds the block's duration in milliseconds to it and observes the
+``rag_stage_duration_seconds`` Prometheus histogram, served on ``/metrics``.
+Stages the pipeline degrades to meet its deadline are counted in
+``rag_degraded_total``.
+
+A stage entered more than once per request (e.g. retrieval for both the raw
+and the rewritten question) accumulates. Concurrent stages are each timed in
+full, so the breakdown can sum to more than ``total``.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import Counter, Histogram
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of the RAG pipeline",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+
+DEGRADED = Counter(
+    "rag_degraded_total",
+    "Requests where a stage was skipped or cut short to meet the deadline",
+    ["stage"],
+)
+
+_current: ContextVar[dict[str, int] | None] = ContextVar("rag_stage_timings", default=None)
+
+
+def start_timings() -> dict[str, int]:
+    """Begin collecting stage timings (ms) for the current request."""
+    timings: dict[str, int] = {}
+    _current.set(timings)
+    return timings
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timings = _current.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0) + int(seconds * 1000)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
@@ -0,0 +1,274 @@
+"""In-process vector index — chunk embeddings in a memory-mapped NumPy matrix.
+
+An alternative to asking pgvector to scan ``sermon_chunks``: top-k is one
+vectorised matrix-vector product plus an argpartition. The matrix lives in a
+snapshot file opened with ``mmap_mode="r"``, so every uvicorn worker on the
+host shares the same pages through the OS page cache.
+
+Layout under ``settings.vector_index_dir`` (relative paths are resolved
+against the backend directory, not the working directory):
+  snapshot-<max id>-<n>-<built at>/embeddings.npy   (n, dims) L2-normalised, float16/32
+  snapshot-<max id>-<n>-<built at>/ids.npy          (n,) int64 chunk ids, ascending
+  CURRENT                                           name of the live snapshot
+
+Snapshots are immutable; a rebuild writes a new directory and then swaps
+CURRENT atomically, and readers pick it up on their next search. Replaced
+snapshots are deleted only once they have been out of use for
+``_SNAPSHOT_GRACE_SECONDS``, so workers still mapping one are unaffected.
+Until the first snapshot exists, searches return None and the caller falls
+back to pgvector.
+
+Rebuilds read chunks from Postgres on the event loop but do all file work
+(copying, writing, renaming) in a worker thread.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SermonChunk
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_BUILD_BATCH_SIZE = 5000
+_SEARCH_BLOCK_ROWS = 65536  # Rows upcast to float32 at a time when searching float16
+_RELOAD_CHECK_SECONDS = 1.0
+_SNAPSHOT_GRACE_SECONDS = 600.0  # How long a replaced snapshot survives for workers still mapping it
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Currently mapped snapshot: (name, ids, embeddings)
+_loaded: tuple[str, np.ndarray, np.ndarray] | None = None
+_checked_at = 0.0
+_warned_missing = False
+
+
+def index_dir() -> str:
+    """``settings.vector_index_dir``, resolved against the backend directory if relative."""
+    return os.path.join(_BACKEND_DIR, settings.vector_index_dir)
+
+
+def _current_path() -> str:
+    return os.path.join(index_dir(), "CURRENT")
+
+
+def _read_current() -> str | None:
+    try:
+        with open(_current_path()) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _open_snapshot(name: str) -> tuple[np.ndarray, np.ndarray]:
+    path = os.path.join(index_dir(), name)
+    ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+    embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+    return ids, embeddings
+
+
+def _get_index() -> tuple[np.ndarray, np.ndarray] | None:
+    """Return the live (ids, embeddings), remapping if CURRENT has moved on."""
+    global _loaded, _checked_at
+    now = time.monotonic()
+    if _loaded is not None and now - _checked_at < _RELOAD_CHECK_SECONDS:
+        return _loaded[1], _loaded[2]
+    _checked_at = now
+
+    name = _read_current()
+    if name is None:
+        return None
+    if _loaded is None or _loaded[0] != name:
+        ids, embeddings = _open_snapshot(name)
+        _loaded = (name, ids, embeddings)
+        logger.info("Mapped vector index %s (%d chunks)", name, len(ids))
+    return _loaded[1], _loaded[2]
+
+
+def search_vector_index(query_embedding: list[float], top_k: int) -> list[tuple[int, float]] | None:
+    """Return [(chunk_id, cosine similarity)] for the top_k nearest chunks.
+
+    Returns None (warning once) if no snapshot has been built yet.
+    """
+    global _warned_missing
+    index = _get_index()
+    if index is None:
+        if not _warned_missing:
+            logger.warning(
+                "No vector index snapshot in %s; using the exact pgvector scan until "
+                "scripts/build_vector_index.py has run", index_dir(),
+            )
+            _warned_missing = True
+        return None
+    _warned_missing = False
+    ids, embeddings = index
+    if len(ids) == 0:
+        return []
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+
+    if embeddings.dtype == np.float32:
+        scores = embeddings @ query
+    else:
+        scores = np.empty(len(ids), dtype=np.float32)
+        for start in range(0, len(ids), _SEARCH_BLOCK_ROWS):
+            block = embeddings[start : start + _SEARCH_BLOCK_ROWS]
+            scores[start : start + len(block)] = block.astype(np.float32) @ query
+
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return list(zip(ids[top].tolist(), scores[top].tolist()))
+
+
+def _normalise(batch: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(batch, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return batch / norms
+
+
+def _start_snapshot(
+    total: int, dims: int, dtype: np.dtype, old_ids: np.ndarray | None, old_embeddings: np.ndarray | None,
+) -> tuple[str, np.ndarray, np.ndarray]:
+    """Create the build directory and output files, copying the old snapshot's rows in."""
+    os.makedirs(index_dir(), exist_ok=True)
+    tmp_path = os.path.join(index_dir(), f".building-{os.getpid()}")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    out_ids = np.lib.format.open_memmap(
+        os.path.join(tmp_path, "ids.npy"), mode="w+", dtype=np.int64, shape=(total,)
+    )
+    out_embeddings = np.lib.format.open_memmap(
+        os.path.join(tmp_path, "embeddings.npy"), mode="w+", dtype=dtype, shape=(total, dims)
+    )
+    old_count = len(old_ids) if old_ids is not None else 0
+    if old_count:
+        out_ids[:old_count] = old_ids
+        for start in range(0, old_count, _SEARCH_BLOCK_ROWS):
+            end = min(start + _SEARCH_BLOCK_ROWS, old_count)
+            out_embeddings[start:end] = old_embeddings[start:end]
+    return tmp_path, out_ids, out_embeddings
+
+
+def _write_batch(out_ids: np.ndarray, out_embeddings: np.ndarray, offset: int, rows: list) -> None:
+    batch = _normalise(np.asarray([row.embedding for row in rows], dtype=np.float32))
+    out_ids[offset : offset + len(rows)] = [row.id for row in rows]
+    out_embeddings[offset : offset + len(rows)] = batch.astype(out_embeddings.dtype)
+
+
+def _publish_snapshot(tmp_path: str, written: int, total: int, name: str, base: str | None) -> None:
+    """Move the finished build into place and point CURRENT at it."""
+    if written < total:
+        _truncate_snapshot(tmp_path, written)
+    os.replace(tmp_path, os.path.join(index_dir(), name))
+
+    pointer_tmp = _current_path() + ".tmp"
+    with open(pointer_tmp, "w") as f:
+        f.write(name)
+    os.replace(pointer_tmp, _current_path())
+
+    _prune_snapshots(keep={name, base})
+
+
+async def rebuild_vector_index(db: AsyncSession, full: bool = False) -> int:
+    """Write a new snapshot and make it current. Returns the number of chunks in it.
+
+    Incremental by default: rows of the current snapshot are copied over and
+    only chunks with a higher id are read from Postgres (ingestion only ever
+    appends). ``full=True`` re-reads every chunk.
+    """
+    dims = settings.embedding_dimensions
+    dtype = np.dtype(settings.vector_index_dtype)
+
+    base = None if full else _read_current()
+    old_ids = old_embeddings = None
+    if base is not None:
+        old_ids, old_embeddings = _open_snapshot(base)
+        if old_embeddings.shape[1] != dims or old_embeddings.dtype != dtype:
+            logger.info("Vector index format changed, rebuilding from scratch")
+            old_ids = old_embeddings = None
+    after_id = int(old_ids[-1]) if old_ids is not None and len(old_ids) else 0
+    old_count = len(old_ids) if old_ids is not None else 0
+
+    new_count = (await db.execute(
+        select(func.count(SermonChunk.id))
+        .where(SermonChunk.id > after_id, SermonChunk.embedding.isnot(None))
+    )).scalar() or 0
+    if old_ids is not None and new_count == 0:
+        return old_count
+
+    total = old_count + new_count
+    tmp_path, out_ids, out_embeddings = await asyncio.to_thread(
+        _start_snapshot, total, dims, dtype, old_ids, old_embeddings,
+    )
+
+    # Keyset-paginate new chunks in id order; only the reads run on the event loop
+    written = old_count
+    last_id = after_id
+    while written < total:
+        result = await db.execute(
+            select(SermonChunk.id, SermonChunk.embedding)
+            .where(SermonChunk.id > last_id, SermonChunk.embedding.isnot(None))
+            .order_by(SermonChunk.id)
+            .limit(min(_BUILD_BATCH_SIZE, total - written))
+        )
+        rows = result.all()
+        if not rows:
+            break
+        await asyncio.to_thread(_write_batch, out_ids, out_embeddings, written, rows)
+        written += len(rows)
+        last_id = rows[-1].id
+
+    # Chunks may have been added since the count; the next rebuild picks them up
+    await asyncio.to_thread(out_ids.flush)
+    await asyncio.to_thread(out_embeddings.flush)
+    del out_ids, out_embeddings
+
+    if old_ids is not None and written == old_count:
+        # The counted chunks were deleted before they could be read: nothing new
+        await asyncio.to_thread(shutil.rmtree, tmp_path, True)
+        return old_count
+
+    # Max id and row count describe the content; the build time keeps the
+    # name from ever matching the live snapshot (e.g. on a full rebuild)
+    name = f"snapshot-{last_id}-{written}-{time.time_ns() // 1_000_000}"
+    await asyncio.to_thread(_publish_snapshot, tmp_path, written, total, name, base)
+    logger.info("Vector index %s written (%d chunks, %d new)", name, written, written - old_count)
+    return written
+
+
+def _truncate_snapshot(path: str, count: int) -> None:
+    for filename in ("ids.npy", "embeddings.npy"):
+        file_path = os.path.join(path, filename)
+        data = np.load(file_path, mmap_mode="r")[:count]
+        np.save(file_path + ".tmp.npy", data)
+        del data
+        os.replace(file_path + ".tmp.npy", file_path)
+
+
+def _prune_snapshots(keep: set[str | None]) -> None:
+    """Delete snapshots replaced more than _SNAPSHOT_GRACE_SECONDS ago.
+
+    A snapshot was replaced when the next newer one was written, so its age
+    out of use is the age of its successor. ``keep`` (the new and previous
+    snapshot) is never deleted.
+    """
+    root = index_dir()
+    snapshots = sorted(
+        (os.path.getmtime(os.path.join(root, entry)), entry)
+        for entry in os.listdir(root)
+        if entry.startswith("snapshot-")
+    )
+    cutoff = time.time() - _SNAPSHOT_GRACE_SECONDS
+    for (_, entry), (replaced_at, _) in zip(snapshots, snapshots[1:]):
+        if entry not in keep and replaced_at < cutoff:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
@@ -0,0 +1,308 @@
+"""Evaluate retrieval quality and latency across settings on real questions.
+
+The labelled query set is built from two sources:
+  - feedback: every rated assistant message, paired with the user question
+    that produced it. For a thumbs-up, the sources it cited are relevant.
+    For a thumbs-down, they are "disliked". This is a weak signal, because a bad
+    answer can come from good sources, so it is reported separately and not
+    used for recall.
+  - ``--golden``: a hand-curated JSONL file, one query per line:
+        {"question": "Apa itu anugerah umum?", "source_ids": [12, 40]}
+        {"question": "...", "source_urls": ["https://youtube.com/watch?v=..."]}
+        {"question": "...", "source_ids": [7], "disliked_source_ids": [31]}
+    ``disliked_source_ids`` feed disliked@n, so a file written by ``--export``
+    reads back unchanged. Golden labels override feedback labels for the same
+    question.
+
+Labels are per source, because citations record sources rather than chunks.
+Feedback labels come from whatever configuration was live when the answer
+was given, so they favour it. The golden file is the unbiased check.
+
+Each query is replayed through retrieve_relevant_chunks and rerank_chunks for
+every combination of the grid options. The first combination is the baseline,
+and every other row shows its change in recall against it:
+  - recall@k: share of relevant sources among the retrieved top_k
+  - recall@n: share of relevant sources in the reranked top_n (what the LLM sees)
+  - MRR: reciprocal rank of the first relevant chunk after reranking
+  - disliked@n: share of thumbs-down sources still in the reranked top_n
+  - latency p50/p95 and mean per-stage time
+
+Query embeddings are computed once up front, so every configuration hits the
+embedding cache and pays the same embed cost. The LLM rerank backend makes
+real API calls; use ``--rerank-backends lexical,none`` for a free run.
+
+    python benchmarks/eval_retrieval.py --top-k 10,20,40 --backends exact,hnsw \\
+        --rerank-backends lexical --golden benchmarks/golden.jsonl --json eval.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys, os
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import async_session, engine
+from app.models import ChatMessage, Feedback, MessageRole, SermonSource
+from app.services.embedder import embed_query
+from app.services.query_engine import retrieve_relevant_chunks
+from app.services.reranker import rerank_chunks
+from app.services.timing import stage, start_timings
+
+settings = get_settings()
+
+REPORTED_STAGES = ["embed_query", "vector_sql", "fts_sql", "fused_sql", "enrich", "rerank"]
+
+# Grid option → the setting it overrides
+GRID = {
+    "top_k": "retrieval_top_k",
+    "rerank_top_n": "rerank_top_n",
+    "rrf_k": "rrf_k",
+    "backend": "vector_backend",
+    "mode": "retrieval_mode",
+    "rerank": "rerank_backend",
+}
+
+
+def _csv(value: str, cast=str) -> list:
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _new_label(question: str, origin: str) -> dict:
+    return {"question": question, "relevant": set(), "disliked": set(), "origin": origin}
+
+
+async def load_feedback_labels(include_follow_ups: bool) -> dict[str, dict]:
+    """Pair each rated assistant message with its question and cited sources."""
+    async with async_session() as db:
+        rated = (await db.execute(
+            select(ChatMessage.id, ChatMessage.conversation_id, ChatMessage.citations, Feedback.is_positive)
+            .join(Feedback, Feedback.message_id == ChatMessage.id)
+            .where(ChatMessage.role == MessageRole.ASSISTANT)
+        )).all()
+        conversation_ids = {row.conversation_id for row in rated}
+        user_messages = (await db.execute(
+            select(ChatMessage.id, ChatMessage.conversation_id, ChatMessage.content)
+            .where(ChatMessage.conversation_id.in_(conversation_ids), ChatMessage.role == MessageRole.USER)
+            .order_by(ChatMessage.id)
+        )).all() if conversation_ids else []
+
+    questions_by_conversation: dict[int, list] = {}
+    for row in user_messages:
+        questions_by_conversation.setdefault(row.conversation_id, []).append(row)
+
+    labels: dict[str, dict] = {}
+    skipped_follow_ups = 0
+    for row in rated:
+        asked = [q for q in questions_by_conversation.get(row.conversation_id, []) if q.id < row.id]
+        if not asked:
+            continue
+        if len(asked) > 1 and not include_follow_ups:
+            skipped_follow_ups += 1  # Retrieval for a follow-up depends on the rewrite, not the raw text
+            continue
+        question = asked[-1].content
+        label = labels.setdefault(_normalize(question), _new_label(question, "feedback"))
+        sources = {c["source_id"] for c in (row.citations or []) if c.get("source_id")}
+        (label["relevant"] if row.is_positive else label["disliked"]).update(sources)
+
+    if skipped_follow_ups:
+        print(f"Skipped {skipped_follow_ups} rated follow-up answers (use --include-follow-ups to replay them)")
+    return labels
+
+
+async def load_golden_labels(path: str) -> dict[str, dict]:
+    entries = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    sys.exit(f"{path}:{line_no}: {e}")
+
+    urls = {url for entry in entries for url in entry.get("source_urls", [])}
+    url_to_id = {}
+    if urls:
+        async with async_session() as db:
+            url_to_id = dict((await db.execute(
+                select(SermonSource.source_url, SermonSource.id).where(SermonSource.source_url.in_(urls))
+            )).all())
+        for url in sorted(urls - url_to_id.keys()):
+            print(f"Golden file: no ingested source for {url}")
+
+    labels = {}
+    for entry in entries:
+        label = _new_label(entry["question"], "golden")
+        label["relevant"].update(entry.get("source_ids", []))
+        label["relevant"].update(url_to_id[u] for u in entry.get("source_urls", []) if u in url_to_id)
+        label["disliked"].update(entry.get("disliked_source_ids", []))
+        labels[_normalize(entry["question"])] = label
+    return labels
+
+
+async def evaluate_query(label: dict, config: dict) -> dict:
+    timings = start_timings()
+    start = time.perf_counter()
+    async with async_session() as db:
+        retrieved = await retrieve_relevant_chunks(db, label["question"], config["top_k"])
+    if config["rerank"] == "none":
+        final = retrieved[: config["rerank_top_n"]]
+    else:
+        with stage("rerank"):
+            final = await rerank_chunks(label["question"], retrieved, config["rerank_top_n"], config["rerank"])
+    latency = time.perf_counter() - start
+
+    relevant, disliked = label["relevant"], label["disliked"]
+    final_sources = [c["source_id"] for c in final]
+    result = {"latency": latency, "timings": timings}
+    if relevant:
+        result["recall_k"] = len(relevant & {c["source_id"] for c in retrieved}) / len(relevant)
+        result["recall_n"] = len(relevant & set(final_sources)) / len(relevant)
+        result["rr"] = next((1.0 / rank for rank, s in enumerate(final_sources, 1) if s in relevant), 0.0)
+    if disliked:
+        result["disliked_n"] = len(disliked & set(final_sources)) / len(disliked)
+    return result
+
+
+async def run_config(labels: list[dict], config: dict, concurrency: int) -> dict:
+    for option, setting in GRID.items():
+        if config[option] != "none":
+            setattr(settings, setting, config[option])
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(label: dict) -> dict:
+        async with semaphore:
+            return await evaluate_query(label, config)
+
+    results = await asyncio.gather(*(one(label) for label in labels))
+
+    def mean_of(key: str) -> float | None:
+        values = [r[key] for r in results if key in r]
+        return round(float(np.mean(values)), 4) if values else None
+
+    latencies_ms = np.array([r["latency"] for r in results]) * 1000
+    return {
+        **config,
+        "queries": len(results),
+        "recall_at_k": mean_of("recall_k"),
+        "recall_at_n": mean_of("recall_n"),
+        "mrr": mean_of("rr"),
+        "disliked_at_n": mean_of("disliked_n"),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 1),
+        "stages_ms": {
+            s: round(float(np.mean([r["timings"].get(s, 0) for r in results])), 1)
+            for s in REPORTED_STAGES
+            if any(s in r["timings"] for r in results)
+        },
+    }
+
+
+def _fmt(value: float | None, baseline: float | None = None) -> str:
+    if value is None:
+        return f"{'-':<14}"
+    if baseline is None:
+        return f"{value:<14.3f}"
+    return f"{value:.3f} ({value - baseline:+.3f})"
+
+
+def print_row(row: dict, baseline: dict | None) -> None:
+    base = baseline or {}
+    stages = " ".join(f"{k}={v}" for k, v in row["stages_ms"].items())
+    print(
+        f"{row['top_k']:>4} {row['rerank_top_n']:>3} {row['rrf_k']:>4} {row['backend']:<7} {row['mode']:<10} {row['rerank']:<8} "
+        f"{_fmt(row['recall_at_k'], base.get('recall_at_k'))} {_fmt(row['recall_at_n'], base.get('recall_at_n'))} "
+        f"{_fmt(row['mrr'], base.get('mrr'))} {_fmt(row['disliked_at_n'])} "
+        f"{row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f}  {stages}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency across settings")
+    parser.add_argument("--golden", help="Hand-curated JSONL labels (see module docstring)")
+    parser.add_argument("--no-feedback", action="store_true", help="Only use the golden file")
+    parser.add_argument("--include-follow-ups", action="store_true", help="Replay rated follow-ups on their raw question")
+    parser.add_argument("--limit", type=int, default=0, help="Evaluate at most this many queries")
+    parser.add_argument("--export", help="Write the labelled query set as golden-format JSONL, for curation")
+    parser.add_argument("--top-k", default=str(settings.retrieval_top_k))
+    parser.add_argument("--rerank-top-n", default=str(settings.rerank_top_n))
+    parser.add_argument("--rrf-k", default=str(settings.rrf_k))
+    parser.add_argument("--backends", default=settings.vector_backend)
+    parser.add_argument("--modes", default=settings.retrieval_mode)
+    parser.add_argument("--rerank-backends", default=settings.rerank_backend, help="llm, lexical and/or none")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    labels = {} if args.no_feedback else await load_feedback_labels(args.include_follow_ups)
+    if args.golden:
+        labels.update(await load_golden_labels(args.golden))
+    queries = [label for label in labels.values() if label["relevant"] or label["disliked"]]
+    if args.limit:
+        queries = queries[: args.limit]
+    if not queries:
+        sys.exit("No labelled queries — collect feedback or pass --golden.")
+
+    if args.export:
+        with open(args.export, "w") as f:
+            for label in queries:
+                f.write(json.dumps({
+                    "question": label["question"],
+                    "source_ids": sorted(label["relevant"]),
+                    "disliked_source_ids": sorted(label["disliked"]),
+                    "origin": label["origin"],
+                }, ensure_ascii=False) + "\n")
+        print(f"Labelled queries written to {args.export}")
+
+    grid = [
+        dict(zip(GRID, values))
+        for values in itertools.product(
+            _csv(args.top_k, int), _csv(args.rerank_top_n, int), _csv(args.rrf_k, int),
+            _csv(args.backends), _csv(args.modes), _csv(args.rerank_backends),
+        )
+    ]
+    scored = sum(1 for q in queries if q["relevant"])
+    golden = sum(1 for q in queries if q["origin"] == "golden")
+    print(f"{len(queries)} queries ({scored} with relevant sources, {golden} golden), {len(grid)} configurations")
+
+    for label in queries:
+        await embed_query(label["question"])
+
+    print(
+        f"\n{'k':>4} {'n':>3} {'rrf':>4} {'backend':<7} {'mode':<10} {'rerank':<8} "
+        f"{'recall@k':<14} {'recall@n':<14} {'MRR':<14} {'disliked@n':<14} {'p50':>8} {'p95':>8}  stages (mean ms)"
+    )
+    rows = []
+    for config in grid:
+        row = await run_config(queries, config, args.concurrency)
+        print_row(row, rows[0] if rows else None)
+        rows.append(row)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(),
+                "queries": len(queries),
+                "scored_queries": scored,
+                "golden_queries": golden,
+                "results": rows,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
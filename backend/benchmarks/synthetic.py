@@ -0,0 +1,198 @@
+"""Deterministic synthetic sermon corpus, embedder and network stubs for benchmarks.
+
+Nothing here calls an API. ``HashingEmbedder`` gives every token a fixed
+random vector (seeded by the token itself) and embeds a text as the
+normalised sum of its token vectors. Texts that share words therefore land
+near each other, so vector search, FTS and RRF behave like they do on real
+data, and the same text always gets the same embedding.
+
+``SyntheticCorpus`` draws sermons from a fixed set of topics. Each chunk mixes
+its topic's words with common words, and queries are drawn from the same
+topics. The generation parameters are stored on every synthetic source
+(``metadata["synthetic"]``), so the benchmark can rebuild the exact query
+set for a corpus without being told how it was generated.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+import numpy as np
+
+# Real words so the FTS side sees realistic tokens; the rest of the vocabulary is generated
+BASE_WORDS = """
+allah tuhan yesus kristus roh kudus injil anugerah iman kasih dosa pertobatan keselamatan
+salib kebangkitan gereja jemaat doa firman alkitab kerajaan sorga hukum taurat nabi rasul
+perjanjian baru lama kebenaran keadilan kemuliaan hikmat pengharapan sukacita damai sejahtera
+penebusan pengudusan pembenaran pilihan predestinasi providensia berdaulat pencipta ciptaan
+manusia hati pikiran jiwa tubuh hidup mati kekal dunia zaman akhir hari penghakiman
+pelayanan pelayan gembala domba murid ketaatan kesetiaan kerendahan kesabaran penderitaan
+pencobaan pengampunan korban imam bait suci ibadah pujian penyembahan reformasi calvin
+luther teologi doktrin katekismus pengakuan sakramen baptisan perjamuan kudus keluarga
+pernikahan anak orang tua pekerjaan panggilan misi penginjilan budaya masyarakat negara
+""".split()
+
+COMMON_WORDS = """
+yang dan di ke dari ini itu dengan untuk tidak ada adalah dalam akan kita kamu saya
+mereka dia juga karena oleh pada sudah bisa harus seperti jika tetapi atau lebih sangat
+""".split()
+
+SPEAKERS = [
+    "Pdt. Dr. Stephen Tong", "Pdt. Billy Kristanto", "Pdt. Dr. Jethro Rachmadi",
+    "Pdt. Aiter", "Pdt. Ivan Kristiono", "Pdt. Budy Setiawan", "Pdt. Dawis Waiman",
+    "Pdt. Agus Marjanto", "Pdt. Hendra Wijaya", "Pdt. Erwan", "Pdt. Jadi S. Lima",
+    "Pdt. Thomy J. Matakupan",
+]
+
+BOOKS = [
+    "Kejadian", "Keluaran", "Mazmur", "Amsal", "Yesaya", "Yeremia", "Matius", "Markus",
+    "Lukas", "Yohanes", "Kisah Para Rasul", "Roma", "1 Korintus", "Galatia", "Efesus",
+    "Filipi", "Kolose", "Ibrani", "Yakobus", "1 Petrus", "Wahyu",
+]
+
+_SYLLABLES = [
+    "ka", "ke", "ki", "ko", "ku", "la", "le", "li", "lo", "lu", "ma", "me", "mi", "mo",
+    "mu", "na", "ne", "ni", "no", "nu", "pa", "pe", "pi", "po", "pu", "ra", "re", "ri",
+    "ro", "ru", "sa", "se", "si", "so", "su", "ta", "te", "ti", "to", "tu", "ba", "be",
+    "bi", "bo", "bu", "da", "de", "di", "do", "du", "ga", "ge", "gi", "go", "gu", "ja",
+]
+
+
+def _stable_seed(*parts) -> int:
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder (L2-normalised sum of per-token random vectors)."""
+
+    def __init__(self, dims: int, seed: int = 0):
+        self.dims = dims
+        self.seed = seed
+        self._index: dict[str, int] = {}
+        self._vectors = np.empty((1024, dims), dtype=np.float32)  # Grown by doubling
+
+    def _token_ids(self, tokens: list[str]) -> list[int]:
+        for token in tokens:
+            if token in self._index:
+                continue
+            row = len(self._index)
+            if row == len(self._vectors):
+                self._vectors = np.concatenate([self._vectors, np.empty_like(self._vectors)])
+            rng = np.random.default_rng(_stable_seed(self.seed, token))
+            self._vectors[row] = rng.standard_normal(self.dims, dtype=np.float32)
+            self._index[token] = row
+        return [self._index[t] for t in tokens]
+
+    def embed(self, text: str) -> np.ndarray:
+        tokens = [t for t in text.lower().replace(".", " ").replace("?", " ").split() if t]
+        if not tokens:
+            return np.zeros(self.dims, dtype=np.float32)
+        ids = self._token_ids(tokens)
+        vector = self._vectors[ids].sum(axis=0)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self.embed(text) for text in texts])
+
+
+class SyntheticCorpus:
+    """Topic-structured sermons and queries, fully determined by the constructor arguments."""
+
+    def __init__(self, seed: int = 42, topics: int = 200, vocab_size: int = 5000,
+                 words_per_chunk: int = 90, topic_words: int = 30):
+        self.seed = seed
+        self.topics = topics
+        self.vocab_size = vocab_size
+        self.words_per_chunk = words_per_chunk
+        rng = np.random.default_rng(seed)
+
+        vocab = list(BASE_WORDS)
+        seen = set(vocab)
+        while len(vocab) < vocab_size:
+            word = "".join(rng.choice(_SYLLABLES, size=rng.integers(2, 5)))
+            if word not in seen:
+                seen.add(word)
+                vocab.append(word)
+        self.vocab = np.array(vocab)
+
+        # Zipf-like background distribution over the whole vocabulary
+        weights = 1.0 / np.arange(1, len(vocab) + 1)
+        self._background = weights / weights.sum()
+        self.topic_vocab = [rng.choice(len(vocab), size=topic_words, replace=False) for _ in range(topics)]
+
+    @property
+    def params(self) -> dict:
+        return {
+            "seed": self.seed, "topics": self.topics, "vocab_size": self.vocab_size,
+            "words_per_chunk": self.words_per_chunk,
+        }
+
+    def source_topic(self, source_index: int) -> int:
+        return _stable_seed(self.seed, "source", source_index) % self.topics
+
+    def source(self, source_index: int) -> dict:
+        """SermonSource field values for the i-th synthetic sermon."""
+        rng = np.random.default_rng(_stable_seed(self.seed, "meta", source_index))
+        topic = self.source_topic(source_index)
+        title_words = self.vocab[rng.choice(self.topic_vocab[topic], size=3, replace=False)]
+        return {
+            "title": f"Khotbah {source_index}: " + " ".join(title_words).title(),
+            "speaker": SPEAKERS[int(rng.integers(len(SPEAKERS)))],
+            "scripture_ref": f"{BOOKS[int(rng.integers(len(BOOKS)))]} {int(rng.integers(1, 30))}:{int(rng.integers(1, 40))}",
+            "sermon_date": datetime(1990, 1, 1) + timedelta(days=int(rng.integers(0, 365 * 35))),
+            "sermon_number": f"SYN-{source_index}",
+            "source_type": ["PDF_MORNING", "PDF_AFTERNOON", "YOUTUBE"][int(rng.integers(3))],
+            "source_url": f"synthetic://{self.seed}/{source_index}",
+        }
+
+    def chunk_text(self, source_index: int, chunk_index: int) -> str:
+        rng = np.random.default_rng(_stable_seed(self.seed, "chunk", source_index, chunk_index))
+        topic = self.topic_vocab[self.source_topic(source_index)]
+        n = self.words_per_chunk
+        from_topic = rng.random(n) < 0.5
+        words = np.where(
+            from_topic,
+            self.vocab[rng.choice(topic, size=n)],
+            self.vocab[rng.choice(len(self.vocab), size=n, p=self._background)],
+        )
+        common = rng.random(n) < 0.25
+        words = np.where(common, np.array(COMMON_WORDS)[rng.integers(len(COMMON_WORDS), size=n)], words)
+
+        sentences = []
+        for start in range(0, n, 12):
+            sentence = " ".join(words[start : start + 12])
+            sentences.append(sentence[:1].upper() + sentence[1:] + ".")
+        return " ".join(sentences)
+
+    def queries(self, count: int, seed_offset: int = 0) -> list[str]:
+        """Short keyword-style questions, each drawn from one topic."""
+        rng = np.random.default_rng(_stable_seed(self.seed, "queries", seed_offset))
+        queries = []
+        for _ in range(count):
+            topic = self.topic_vocab[int(rng.integers(self.topics))]
+            words = self.vocab[rng.choice(topic, size=int(rng.integers(3, 8)), replace=False)]
+            queries.append("Apa kata khotbah tentang " + " ".join(words) + "?")
+        return queries
+
+
+def install_stubs(embedder: HashingEmbedder) -> None:
+    """Replace query embedding and LLM calls on the retrieval path with local stubs."""
+    from app.services import embedder as embedder_module
+    from app.services import llm_provider, query_engine, query_rewriter, reranker
+
+    async def embed_query(text: str) -> list[float]:
+        return embedder.embed(text).tolist()
+
+    async def achat_completion(messages: list[dict], *args, **kwargs) -> str:
+        return messages[-1]["content"]  # Rewrites become the question itself
+
+    async def achat_completion_stream(messages: list[dict], *args, **kwargs):
+        for word in messages[-1]["content"].split(" "):
+            yield word + " "
+
+    embedder_module.embed_query = embed_query
+    query_engine.embed_query = embed_query
+    for module in (llm_provider, query_engine, query_rewriter, reranker):
+        if hasattr(module, "achat_completion"):
+            module.achat_completion = achat_completion
+        if hasattr(module, "achat_completion_stream"):
+            module.achat_completion_stream = achat_completion_stream
@@ -0,0 +1,53 @@
+"""Test-mode auth for load tests: a local RSA key, its JWKS and Clerk-shaped tokens.
+
+The mock server serves ``jwks(key)`` at ``/.well-known/jwks.json``; pointing
+CLERK_JWKS_URL / CLERK_ISSUER at it lets the app verify tokens minted here
+exactly as it verifies real Clerk tokens (RS256 via PyJWKClient).
+"""
+
+import os
+import time
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+KEY_ID = "loadtest"
+DEFAULT_KEY_FILE = os.path.join("data", "loadtest_key.pem")
+
+
+def load_or_create_key(path: str = DEFAULT_KEY_FILE) -> rsa.RSAPrivateKey:
+    """Load the shared signing key, generating it on first use."""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return serialization.load_pem_private_key(f.read(), password=None)
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return key
+
+
+def jwks(key: rsa.RSAPrivateKey) -> dict:
+    jwk = RSAAlgorithm.to_jwk(key.public_key(), as_dict=True)
+    return {"keys": [{**jwk, "kid": KEY_ID, "use": "sig", "alg": "RS256"}]}
+
+
+def mint_token(key: rsa.RSAPrivateKey, issuer: str, user_index: int, ttl_seconds: int = 3600) -> str:
+    """A Clerk-style session token for synthetic user ``user_index``."""
+    now = int(time.time())
+    claims = {
+        "sub": f"user_loadtest_{user_index}",
+        "email": f"loadtest+{user_index}@example.com",
+        "name": f"Load Test {user_index}",
+        "iss": issuer,
+        "iat": now,
+        "nbf": now - 5,
+        "exp": now + ttl_seconds,
+    }
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": KEY_ID})
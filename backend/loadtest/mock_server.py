@@ -0,0 +1,352 @@
+"""Mock OpenAI / Anthropic / Gemini server for load tests.
+
+Implements the endpoints the app calls, enough for the official SDKs:
+  POST /v1/embeddings                         OpenAI embeddings (float or base64)
+  POST /v1/chat/completions                   OpenAI chat, streaming and not
+  POST /v1/messages                           Anthropic messages, streaming and not
+  POST /v1beta/models/{model}:generateContent / :streamGenerateContent (Gemini)
+  GET  /.well-known/jwks.json                 test-mode JWKS for loadtest/auth.py tokens
+  GET  /stats                                 request counts per call kind
+
+Latency is sampled from log-normal distributions around configurable medians.
+Answers stream word by word at ``--tokens-per-second``. Calls are classified
+from the prompt: query rewrite, pointwise or listwise rerank, or answer
+generation. Each kind gets a reply the app can parse. Embeddings come from
+the benchmarks' HashingEmbedder, so retrieval against a corpus generated by
+benchmarks/generate_corpus.py returns relevant chunks.
+
+Run it, then start the app pointed at it:
+
+    python loadtest/mock_server.py --port 9100
+
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 ANTHROPIC_BASE_URL=http://127.0.0.1:9100 \\
+    GOOGLE_BASE_URL=http://127.0.0.1:9100 OPENAI_API_KEY=mock ANTHROPIC_API_KEY=mock GOOGLE_API_KEY=mock \\
+    CLERK_JWKS_URL=http://127.0.0.1:9100/.well-known/jwks.json CLERK_ISSUER=http://127.0.0.1:9100 \\
+    RATE_LIMIT_ENABLED=false uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import sys, os
+import time
+from collections import Counter
+from dataclasses import dataclass
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.synthetic import BASE_WORDS, COMMON_WORDS, HashingEmbedder
+from loadtest.auth import DEFAULT_KEY_FILE, jwks, load_or_create_key
+
+
+@dataclass
+class LatencyProfile:
+    ttft_ms: float = 600.0  # Median time to first answer token
+    ttft_sigma: float = 0.5  # Log-normal spread; 0.5 puts p95 at ~2.3× the median
+    tokens_per_second: float = 60.0
+    answer_tokens: int = 250
+    mini_ms: float = 350.0  # Median latency of rewrite / rerank calls
+    embed_ms: float = 120.0
+    error_rate: float = 0.0  # Fraction of calls answered with a provider 5xx
+
+    def sample(self, median_ms: float) -> float:
+        return median_ms * random.lognormvariate(0, self.ttft_sigma) / 1000
+
+
+profile = LatencyProfile()
+counts: Counter = Counter()
+_embedders: dict[int, HashingEmbedder] = {}
+_seen_prefixes: set[str] = set()
+_ANSWER_WORDS = BASE_WORDS + COMMON_WORDS * 3
+
+app = FastAPI(title="Mock LLM providers")
+
+
+# ─── Prompt classification and replies ───
+
+def _classify(system: str, prompt: str) -> str:
+    tail = prompt.rstrip()
+    if "query rewriter" in system:
+        return "rewrite"
+    if tail.endswith("Scores:"):
+        return "rerank_listwise"
+    if tail.endswith("Score:"):
+        return "rerank"
+    return "answer"
+
+
+def _stable(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "little")
+
+
+def _reply(kind: str, prompt: str) -> str:
+    if kind == "rewrite":
+        return prompt.strip().splitlines()[-1][:200]
+    if kind == "rerank":
+        return str(_stable(prompt) % 11)
+    if kind == "rerank_listwise":
+        ids = re.findall(r"^\[(\d+)\]", prompt, flags=re.MULTILINE)
+        return json.dumps({i: _stable(prompt + i) % 11 for i in ids})
+    rng = random.Random(_stable(prompt))
+    words = [rng.choice(_ANSWER_WORDS) for _ in range(profile.answer_tokens)]
+    return " ".join(words) + " [SYN-1 - Khotbah sintetis]."
+
+
+def _tokens(text: str) -> list[str]:
+    words = text.split(" ")
+    return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _cached_tokens(system: str) -> int:
+    """Simulate implicit prefix caching: a system prompt seen before counts as cached."""
+    if not system:
+        return 0
+    key = hashlib.sha1(system.encode()).hexdigest()
+    if key in _seen_prefixes:
+        return _count_tokens(system)
+    _seen_prefixes.add(key)
+    return 0
+
+
+async def _wait_first(kind: str) -> None:
+    await asyncio.sleep(profile.sample(profile.ttft_ms if kind == "answer" else profile.mini_ms))
+
+
+def _maybe_error(status: int, body: dict) -> JSONResponse | None:
+    if profile.error_rate and random.random() < profile.error_rate:
+        counts["errors"] += 1
+        return JSONResponse(body, status_code=status)
+    return None
+
+
+def _sse(data: dict | str, event: str | None = None) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data)
+    return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
+
+
+async def _paced(tokens: list[str]):
+    delay = 1.0 / profile.tokens_per_second
+    for i, token in enumerate(tokens):
+        if i:
+            await asyncio.sleep(delay)
+        yield token
+
+
+# ─── Test-mode auth ───
+
+@app.get("/.well-known/jwks.json")
+async def jwks_endpoint():
+    return app.state.jwks
+
+
+@app.get("/stats")
+async def stats():
+    return dict(counts)
+
+
+# ─── OpenAI ───
+
+@app.post("/v1/embeddings")
+async def openai_embeddings(request: Request):
+    body = await request.json()
+    if error := _maybe_error(500, {"error": {"message": "mock failure", "type": "server_error"}}):
+        return error
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    dims = body.get("dimensions") or 3072
+    embedder = _embedders.setdefault(dims, HashingEmbedder(dims))
+    counts["embeddings"] += 1
+    await asyncio.sleep(profile.sample(profile.embed_ms))
+
+    data = []
+    for i, text in enumerate(inputs):
+        vector = embedder.embed(str(text))
+        if body.get("encoding_format") == "base64":
+            embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode()
+        else:
+            embedding = vector.tolist()
+        data.append({"object": "embedding", "index": i, "embedding": embedding})
+    tokens = sum(_count_tokens(str(t)) for t in inputs)
+    return {
+        "object": "list", "data": data, "model": body.get("model"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def openai_chat(request: Request):
+    body = await request.json()
+    if error := _maybe_error(500, {"error": {"message": "mock failure", "type": "server_error"}}):
+        return error
+    messages = body["messages"]
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    prompt = messages[-1]["content"]
+    kind = _classify(system, prompt)
+    counts[f"openai_{kind}"] += 1
+    text = _reply(kind, prompt)
+    prompt_tokens = sum(_count_tokens(m["content"]) for m in messages)
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": _count_tokens(text),
+        "total_tokens": prompt_tokens + _count_tokens(text),
+        "prompt_tokens_details": {"cached_tokens": _cached_tokens(system)},
+    }
+    base = {"id": f"chatcmpl-mock{time.time_ns()}", "created": int(time.time()), "model": body.get("model")}
+
+    await _wait_first(kind)
+    if not body.get("stream"):
+        return {
+            **base, "object": "chat.completion", "usage": usage,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }
+
+    async def events():
+        chunk = {**base, "object": "chat.completion.chunk"}
+        async for token in _paced(_tokens(text)):
+            yield _sse({**chunk, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+        yield _sse({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield _sse({**chunk, "choices": [], "usage": usage})
+        yield _sse("[DONE]")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ─── Anthropic ───
+
+def _anthropic_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+@app.post("/v1/messages")
+async def anthropic_messages(request: Request):
+    body = await request.json()
+    if error := _maybe_error(529, {"type": "error", "error": {"type": "overloaded_error", "message": "mock overload"}}):
+        return error
+    system = _anthropic_text(body.get("system") or "")
+    prompt = _anthropic_text(body["messages"][-1]["content"])
+    kind = _classify(system, prompt)
+    counts[f"anthropic_{kind}"] += 1
+    text = _reply(kind, prompt)
+    cached = _cached_tokens(system)
+    input_tokens = _count_tokens(system) + sum(_count_tokens(_anthropic_text(m["content"])) for m in body["messages"]) - cached
+    usage = {"input_tokens": input_tokens, "output_tokens": _count_tokens(text),
+             "cache_read_input_tokens": cached, "cache_creation_input_tokens": 0}
+    message = {
+        "id": f"msg_mock{time.time_ns()}", "type": "message", "role": "assistant",
+        "model": body.get("model"), "stop_sequence": None,
+    }
+
+    await _wait_first(kind)
+    if not body.get("stream"):
+        return {**message, "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "usage": usage}
+
+    async def events():
+        yield _sse({"type": "message_start", "message": {
+            **message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1},
+        }}, "message_start")
+        yield _sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                   "content_block_start")
+        async for token in _paced(_tokens(text)):
+            yield _sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}},
+                       "content_block_delta")
+        yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        yield _sse({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": usage["output_tokens"]}}, "message_delta")
+        yield _sse({"type": "message_stop"}, "message_stop")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ─── Gemini ───
+
+@app.post("/v1beta/models/{target}")
+async def gemini_generate(target: str, request: Request):
+    model, _, action = target.partition(":")
+    body = await request.json()
+    if error := _maybe_error(503, {"error": {"code": 503, "message": "mock unavailable", "status": "UNAVAILABLE"}}):
+        return error
+    system = "".join(p.get("text", "") for p in (body.get("systemInstruction") or {}).get("parts", []))
+    prompt = "".join(p.get("text", "") for p in body["contents"][-1]["parts"])
+    kind = _classify(system, prompt)
+    counts[f"google_{kind}"] += 1
+    text = _reply(kind, prompt)
+    prompt_tokens = _count_tokens(system) + sum(
+        _count_tokens("".join(p.get("text", "") for p in c["parts"])) for c in body["contents"]
+    )
+    usage = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": _count_tokens(text),
+        "totalTokenCount": prompt_tokens + _count_tokens(text),
+        "cachedContentTokenCount": _cached_tokens(system),
+    }
+
+    def candidate(part_text: str, finish: str | None = None) -> dict:
+        cand = {"content": {"role": "model", "parts": [{"text": part_text}]}, "index": 0}
+        if finish:
+            cand["finishReason"] = finish
+        return cand
+
+    await _wait_first(kind)
+    if action != "streamGenerateContent":
+        return {"candidates": [candidate(text, "STOP")], "usageMetadata": usage, "modelVersion": model}
+
+    async def events():
+        tokens = _tokens(text)
+        async for i, token in _aenumerate(_paced(tokens)):
+            last = i == len(tokens) - 1
+            chunk = {"candidates": [candidate(token, "STOP" if last else None)], "modelVersion": model}
+            if last:
+                chunk["usageMetadata"] = usage
+            yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def _aenumerate(iterator):
+    i = 0
+    async for item in iterator:
+        yield i, item
+        i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock LLM/embedding provider server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--key-file", default=DEFAULT_KEY_FILE, help="RSA key shared with loadtest/run.py")
+    parser.add_argument("--ttft-ms", type=float, default=profile.ttft_ms)
+    parser.add_argument("--sigma", type=float, default=profile.ttft_sigma)
+    parser.add_argument("--tokens-per-second", type=float, default=profile.tokens_per_second)
+    parser.add_argument("--answer-tokens", type=int, default=profile.answer_tokens)
+    parser.add_argument("--mini-ms", type=float, default=profile.mini_ms)
+    parser.add_argument("--embed-ms", type=float, default=profile.embed_ms)
+    parser.add_argument("--error-rate", type=float, default=profile.error_rate)
+    args = parser.parse_args()
+
+    profile.ttft_ms = args.ttft_ms
+    profile.ttft_sigma = args.sigma
+    profile.tokens_per_second = args.tokens_per_second
+    profile.answer_tokens = args.answer_tokens
+    profile.mini_ms = args.mini_ms
+    profile.embed_ms = args.embed_ms
+    profile.error_rate = args.error_rate
+    app.state.jwks = jwks(load_or_create_key(args.key_file))
+
+    print(f"Mock providers on http://{args.host}:{args.port} (issuer http://{args.host}:{args.port}) — {profile}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
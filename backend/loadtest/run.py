@@ -0,0 +1,201 @@
+"""Closed-loop load generator for /api/chat and /api/chat/stream.
+
+``--concurrency`` virtual users each send a request, wait for the full
+response, and send the next. This continues until ``--duration`` seconds or
+``--requests`` in total. Each virtual user is its own synthetic account, with
+a token minted from the mock server's test-mode key, so the app authenticates
+it like a real Clerk session.
+
+Reported per endpoint: throughput, error rate (by status), total latency
+p50/p90/p95/p99 and, for the stream, time to first token.
+
+    python loadtest/run.py --base-url http://127.0.0.1:8000 --issuer http://127.0.0.1:9100 \\
+        --endpoints chat,stream --concurrency 32 --duration 60 --json load.json
+
+Questions come from the benchmarks' synthetic corpus (same seed as
+generate_corpus.py by default). With ``--follow-up`` a fraction of stream
+requests continue their previous conversation, which exercises the rewrite path.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys, os
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import SyntheticCorpus
+from loadtest.auth import DEFAULT_KEY_FILE, load_or_create_key, mint_token
+
+ENDPOINTS = {"chat": "/api/chat", "stream": "/api/chat/stream"}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.ttfts: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, status: str, latency: float, ttft: float | None = None) -> None:
+        self.statuses[endpoint][status] += 1
+        if status == "200":
+            self.latencies[endpoint].append(latency)
+            if ttft is not None:
+                self.ttfts[endpoint].append(ttft)
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ms = np.array(values) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 1) for p in (50, 90, 95, 99)}
+
+
+async def chat_once(client: httpx.AsyncClient, token: str, question: str, bypass_cache: bool,
+                    recorder: Recorder) -> None:
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            ENDPOINTS["chat"],
+            json={"question": question, "bypass_cache": bypass_cache},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        recorder.record("chat", str(response.status_code), time.perf_counter() - start)
+    except httpx.HTTPError as e:
+        recorder.record("chat", type(e).__name__, time.perf_counter() - start)
+
+
+async def stream_once(client: httpx.AsyncClient, token: str, question: str, bypass_cache: bool,
+                      conversation_id: int | None, recorder: Recorder) -> int | None:
+    """Run one streamed question; returns the conversation id for follow-ups."""
+    start = time.perf_counter()
+    ttft = None
+    status = "200"
+    payload = {"question": question, "bypass_cache": bypass_cache}
+    if conversation_id:
+        payload["conversation_id"] = conversation_id
+    try:
+        async with client.stream(
+            "POST", ENDPOINTS["stream"], json=payload, headers={"Authorization": f"Bearer {token}"},
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                status = str(response.status_code)
+            else:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[6:])
+                    if event["type"] == "conversation":
+                        conversation_id = event["conversation_id"]
+                    elif event["type"] == "token":
+                        if "[Backend Crash" in event["content"]:
+                            status = "backend_crash"
+                        elif ttft is None:
+                            ttft = time.perf_counter() - start
+        recorder.record("stream", status, time.perf_counter() - start, ttft)
+    except httpx.HTTPError as e:
+        recorder.record("stream", type(e).__name__, time.perf_counter() - start)
+    return conversation_id
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--issuer", default="http://127.0.0.1:9100", help="Must match the app's CLERK_ISSUER")
+    parser.add_argument("--key-file", default=DEFAULT_KEY_FILE)
+    parser.add_argument("--endpoints", default="chat,stream")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds (ignored if --requests is set)")
+    parser.add_argument("--requests", type=int, default=0)
+    parser.add_argument("--follow-up", type=float, default=0.0, help="Fraction of stream requests that continue a conversation")
+    parser.add_argument("--use-cache", action="store_true", help="Allow semantic answer-cache hits")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        sys.exit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    key = load_or_create_key(args.key_file)
+    tokens = [mint_token(key, args.issuer, i, ttl_seconds=int(args.duration) + 3600) for i in range(args.concurrency)]
+    questions = SyntheticCorpus(seed=args.seed).queries(1000, seed_offset=2)
+    rng = random.Random(args.seed)
+
+    recorder = Recorder()
+    counter = itertools.count()
+    deadline = time.monotonic() + args.duration
+    bypass_cache = not args.use_cache
+
+    def next_request() -> int | None:
+        n = next(counter)
+        if args.requests:
+            return n if n < args.requests else None
+        return n if time.monotonic() < deadline else None
+
+    async def virtual_user(worker: int, client: httpx.AsyncClient) -> None:
+        token = tokens[worker]
+        conversation_id = None
+        while (n := next_request()) is not None:
+            endpoint = endpoints[n % len(endpoints)]
+            question = questions[n % len(questions)]
+            if endpoint == "chat":
+                await chat_once(client, token, question, bypass_cache, recorder)
+            else:
+                follow = conversation_id if rng.random() < args.follow_up else None
+                conversation_id = await stream_once(client, token, question, bypass_cache, follow, recorder)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        print(f"Load: {args.concurrency} virtual users → {args.base_url} ({', '.join(endpoints)})")
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(w, client) for w in range(args.concurrency)))
+        wall = time.perf_counter() - start
+
+    results = {}
+    print(f"\n{'endpoint':<8} {'reqs':>6} {'ok/s':>7} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'ttft50':>8} {'ttft95':>8}")
+    for endpoint in endpoints:
+        statuses = recorder.statuses[endpoint]
+        total = sum(statuses.values())
+        ok = statuses.get("200", 0)
+        row = {
+            "requests": total,
+            "throughput_rps": round(ok / wall, 2),
+            "error_rate": round(1 - ok / total, 4) if total else 0.0,
+            "statuses": dict(statuses),
+            "latency": _percentiles(recorder.latencies[endpoint]),
+            "ttft": _percentiles(recorder.ttfts[endpoint]),
+        }
+        results[endpoint] = row
+        lat, ttft = row["latency"], row["ttft"]
+        print(
+            f"{endpoint:<8} {total:>6} {row['throughput_rps']:>7.2f} {row['error_rate'] * 100:>5.1f}% "
+            f"{lat.get('p50_ms', 0):>8.0f} {lat.get('p95_ms', 0):>8.0f} {lat.get('p99_ms', 0):>8.0f} "
+            f"{ttft.get('p50_ms', 0):>8.0f} {ttft.get('p95_ms', 0):>8.0f}"
+        )
+        if ok < total:
+            print(f"         statuses: {dict(statuses)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(),
+                "base_url": args.base_url,
+                "concurrency": args.concurrency,
+                "wall_seconds": round(wall, 2),
+                "endpoints": results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Backfill the reduced-dimension ANN column (sermon_chunks.embedding_ann).
+
+Fills rows ingested before the column existed by Matryoshka-truncating the
+full embedding inside Postgres (pgvector >= 0.7), in id-ordered batches.
+
+Use --recreate after changing ANN_DIMENSIONS: it drops and re-adds the column
+and HNSW index at the new size before backfilling.
+"""
+import argparse
+import asyncio
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import engine, init_db
+
+settings = get_settings()
+
+
+async def recreate_column(dims: int):
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX IF EXISTS ix_sermon_chunks_embedding_ann"))
+        await conn.execute(text("ALTER TABLE sermon_chunks DROP COLUMN IF EXISTS embedding_ann"))
+        await conn.execute(text(f"ALTER TABLE sermon_chunks ADD COLUMN embedding_ann halfvec({dims})"))
+    print(f"Recreated embedding_ann as halfvec({dims}).")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill sermon_chunks.embedding_ann")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--recreate", action="store_true", help="Drop and re-add the column at ANN_DIMENSIONS first")
+    args = parser.parse_args()
+
+    dims = settings.ann_dimensions
+    if args.recreate:
+        await recreate_column(dims)
+
+    # Builds the HNSW index if it's missing
+    await init_db()
+
+    total = 0
+    last_id = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                text(f"""
+                    WITH batch AS (
+                        SELECT id FROM sermon_chunks
+                        WHERE id > :last_id AND embedding_ann IS NULL AND embedding IS NOT NULL
+                        ORDER BY id
+                        LIMIT :batch_size
+                    )
+                    UPDATE sermon_chunks sc
+                    SET embedding_ann = l2_normalize(subvector(sc.embedding, 1, {dims}))::halfvec({dims})
+                    FROM batch
+                    WHERE sc.id = batch.id
+                    RETURNING sc.id
+                """),
+                {"last_id": last_id, "batch_size": args.batch_size},
+            )
+            ids = [row[0] for row in result]
+        if not ids:
+            break
+        last_id = max(ids)
+        total += len(ids)
+        print(f"  Backfilled {total} chunks (up to id {last_id})")
+
+    print(f"\nDone. {total} chunks backfilled at {dims} dims.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Backfill the binary-quantized embedding column (sermon_chunks.embedding_bin).
+
+Fills rows ingested before the column existed with pgvector's
+binary_quantize() of the full embedding, in id-ordered batches.
+"""
+import argparse
+import asyncio
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import engine, init_db
+
+settings = get_settings()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill sermon_chunks.embedding_bin")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    # Adds the column if it's missing
+    await init_db()
+
+    dims = settings.embedding_dimensions
+    total = 0
+    last_id = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                text(f"""
+                    WITH batch AS (
+                        SELECT id FROM sermon_chunks
+                        WHERE id > :last_id AND embedding_bin IS NULL AND embedding IS NOT NULL
+                        ORDER BY id
+                        LIMIT :batch_size
+                    )
+                    UPDATE sermon_chunks sc
+                    SET embedding_bin = binary_quantize(sc.embedding)::bit({dims})
+                    FROM batch
+                    WHERE sc.id = batch.id
+                    RETURNING sc.id
+                """),
+                {"last_id": last_id, "batch_size": args.batch_size},
+            )
+            ids = [row[0] for row in result]
+        if not ids:
+            break
+        last_id = max(ids)
+        total += len(ids)
+        print(f"  Backfilled {total} chunks (up to id {last_id})")
+
+    print(f"\nDone. {total} chunks backfilled.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,6 +10,7 @@ load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 from sqlalchemy import select
 from app.database import async_session, init_db
 from app.models import SermonSource
+from app.services.corpus import sync_chunk_metadata
 from app.services.pdf_parser import extract_text_from_pdf, SPEAKER_MAP, parse_filename
 
 SERMON_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "Khotbah", "GRII KU Indonesia")
@@ -68,7 +69,10 @@ async def main():
             sermon.speaker = speaker
             updated += 1
         
+        await db.flush()
+        synced = await sync_chunk_metadata(db, [s.id for s in sermons])
         await db.commit()
+        print(f"\nCopied speakers onto {synced} chunks.")
         
         print(f"\n{'='*50}")
         print(f"Total updated:    {updated}")
@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy import select
 from app.database import engine, async_session
 from app.models import SermonSource, SourceType
+from app.services.corpus import sync_chunk_metadata
 
 
 def extract_speaker_from_yt_title(title: str) -> str:
@@ -44,7 +45,10 @@ async def main():
             elif not speaker:
                 print(f"  [{source.id}] {source.title} -> NO SPEAKER FOUND")
 
+        await db.flush()
+        synced = await sync_chunk_metadata(db, [s.id for s in sources])
         await db.commit()
+        print(f"Copied speakers onto {synced} chunks.")
         print(f"\nUpdated {updated}/{len(sources)} YouTube sources with speaker names.")
 
 
@@ -0,0 +1,34 @@
+"""Build or refresh the memory-mapped vector index snapshot (vector_backend="mmap").
+
+Incremental by default — only chunks added since the current snapshot are
+read from Postgres. Pass --full to rebuild every row (e.g. after changing
+VECTOR_INDEX_DTYPE or deleting sources).
+"""
+import argparse
+import asyncio
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+from app.config import get_settings
+from app.database import async_session, init_db
+from app.services.vector_index import index_dir, rebuild_vector_index
+
+settings = get_settings()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped vector index")
+    parser.add_argument("--full", action="store_true", help="Rebuild from scratch instead of appending")
+    args = parser.parse_args()
+
+    await init_db()
+    async with async_session() as db:
+        count = await rebuild_vector_index(db, full=args.full)
+
+    print(f"Vector index in {index_dir()}: {count} chunks ({settings.vector_index_dtype}).")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())